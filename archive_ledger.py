@@ -0,0 +1,23 @@
+import argparse
+
+from database import SessionLocal
+from services import ledger_archive
+
+def archive(hot_months: int):
+    db = SessionLocal()
+    try:
+        print(f"Archiving inventory transactions older than the last {hot_months} month(s) to {ledger_archive.LEDGER_ARCHIVE_DIR}")
+        for month, moved in ledger_archive.archive_closed_months(db, hot_months):
+            print(f"  {month:%Y-%m}: {moved} rows")
+        print("Archive complete!")
+    except Exception as e:
+        db.rollback()
+        print(f"Error archiving inventory transactions: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move closed months of the inventory ledger into compressed archive files")
+    parser.add_argument("--hot-months", type=int, default=ledger_archive.LEDGER_HOT_MONTHS, help="months kept in the table, the current one included")
+    args = parser.parse_args()
+    archive(args.hot_months)
@@ -0,0 +1,94 @@
+"""Compare request latency between the sync (threadpool) and async (AsyncSession) modes.
+
+Starts uvicorn once per mode with DB_ASYNC switched off/on, fires the same
+read-heavy request mix at high concurrency and prints p50/p95/p99 latency.
+Point it at a database that already has data (e.g. after `python demo_data.py`).
+
+    python benchmarks/async_vs_sync.py --requests 5000 --concurrency 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+import httpx
+
+from http_load import percentile, wait_until_ready
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def request_mix():
+    today = date.today()
+    start = (today - timedelta(days=90)).isoformat()
+    return [
+        "/api/products/",
+        "/api/sales/orders?limit=50",
+        "/api/inventory/low-stock",
+        f"/api/analytics/revenue?start_date={start}&end_date={today.isoformat()}&group_by=week",
+    ]
+
+async def drive(base_url, total, concurrency):
+    paths = request_mix()
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(paths[i % len(paths)])
+
+    async def worker(client):
+        nonlocal errors
+        while not queue.empty():
+            path = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+def run_mode(async_mode, args):
+    env = dict(os.environ, DB_ASYNC="true" if async_mode else "false")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=ROOT, env=env
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_until_ready(base_url)
+        asyncio.run(drive(base_url, min(200, args.requests), args.concurrency))  # warm up
+        return asyncio.run(drive(base_url, args.requests, args.concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{'mode':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for async_mode in (False, True):
+        latencies, errors, elapsed = run_mode(async_mode, args)
+        print(
+            f"{'async' if async_mode else 'sync':<6} {len(latencies) / elapsed:>8.0f} "
+            f"{statistics.median(latencies):>8.1f} {percentile(latencies, 95):>8.1f} "
+            f"{percentile(latencies, 99):>8.1f} {errors:>7}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Compare the columnar analytics snapshot with SQL GROUP BY over the raw tables.
+
+By default seeds a throwaway SQLite database per size with synthetic orders
+(about two lines each), then times:
+  * the initial snapshot load and its memory footprint per row
+  * revenue by day over the full range
+  * revenue by marketplace x category x week
+
+    python benchmarks/columnar_vs_sql.py --orders 1000000 10000000
+
+Pass --url to run against an existing, already seeded database instead.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+import numpy as np
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.py needs credentials even though we bind our own engine
+for key in ("DB_USER", "DB_PASSWORD", "DB_HOST", "DB_NAME"):
+    os.environ.setdefault(key, "benchmark")
+
+from database import Base  # noqa: E402
+from models.product import Category, Product  # noqa: E402
+from models.inventory import Inventory  # noqa: E402,F401
+from models.sales import Order, OrderItem  # noqa: E402
+from services import columnar_analytics  # noqa: E402
+
+MARKETPLACES = ["amazon", "walmart", "direct"]
+DAYS = 3 * 365
+CHUNK = 200_000
+
+def seed(engine, order_count, product_count=1000, category_count=20):
+    Base.metadata.create_all(engine)
+    rng = np.random.default_rng(42)
+    start = np.datetime64(date.today()) - DAYS
+    with engine.begin() as conn:
+        conn.execute(insert(Category), [{"name": f"Category {i}"} for i in range(category_count)])
+        conn.execute(insert(Product), [
+            {"sku": f"SKU-{i}", "name": f"Product {i}", "price": 10.0, "category_id": 1 + i % category_count}
+            for i in range(product_count)
+        ])
+        next_item_id = 1
+        for offset in range(0, order_count, CHUNK):
+            n = min(CHUNK, order_count - offset)
+            ids = np.arange(offset + 1, offset + n + 1)
+            dates = (start + rng.integers(0, DAYS, n)).astype("datetime64[s]").astype(object)
+            totals = rng.uniform(5, 500, n).round(2)
+            markets = rng.integers(0, len(MARKETPLACES), n)
+            conn.execute(insert(Order), [
+                {"id": int(ids[i]), "order_number": f"ORD-{ids[i]}", "order_date": dates[i], "status": "delivered",
+                 "payment_status": "paid", "subtotal": float(totals[i]), "tax": 0.0, "shipping_cost": 0.0,
+                 "total": float(totals[i]), "marketplace": MARKETPLACES[markets[i]],
+                 "created_at": dates[i], "updated_at": dates[i]}
+                for i in range(n)
+            ])
+            lines = rng.integers(1, 4, n)
+            line_orders = np.repeat(np.arange(n), lines)
+            products = rng.integers(1, product_count + 1, len(line_orders))
+            subtotals = rng.uniform(5, 200, len(line_orders)).round(2)
+            conn.execute(insert(OrderItem), [
+                {"id": next_item_id + j, "order_id": int(ids[line_orders[j]]), "product_id": int(products[j]),
+                 "quantity": 1, "unit_price": float(subtotals[j]), "subtotal": float(subtotals[j]),
+                 "created_at": dates[line_orders[j]]}
+                for j in range(len(line_orders))
+            ])
+            next_item_id += len(line_orders)
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def run(url, label):
+    engine = create_engine(url)
+    db = sessionmaker(bind=engine)()
+    start_date, end_date = date.today().replace(year=date.today().year - 4), date.today()
+
+    snapshot = columnar_analytics.OrderSnapshot()
+    started = time.perf_counter()
+    snapshot.catch_up(db)
+    load_s = time.perf_counter() - started
+    memory = snapshot.memory_usage()
+
+    day = func.date(Order.order_date)
+    sql_by_day = lambda: db.execute(
+        select(day, func.sum(Order.total), func.count(Order.id))
+        .where(Order.order_date.between(start_date, end_date)).group_by(day)
+    ).all()
+    sql_cube = lambda: db.execute(
+        select(Order.marketplace, Product.category_id, day, func.sum(OrderItem.subtotal))
+        .join(Order, Order.id == OrderItem.order_id).join(Product, Product.id == OrderItem.product_id)
+        .where(Order.order_date.between(start_date, end_date))
+        .group_by(Order.marketplace, Product.category_id, day)
+    ).all()
+
+    print(f"\n{label}: {memory['orders']:,} orders, {memory['order_items']:,} lines")
+    print(f"  snapshot load            {load_s:10.1f} s")
+    print(f"  memory                   {memory['bytes_per_order']:.0f} B/order, {memory['bytes_per_item']:.0f} B/line, "
+          f"{memory['total_bytes'] / 2**20:.1f} MiB total")
+    print(f"  revenue by day      sql  {timed(sql_by_day, 1):10.1f} ms   columnar {timed(lambda: snapshot.revenue_by_period(start_date, end_date, 'day')):8.1f} ms")
+    print(f"  mkt x category x wk sql  {timed(sql_cube, 1):10.1f} ms   columnar {timed(lambda: snapshot.slice_sales(start_date, end_date, ('marketplace', 'category', 'week'))):8.1f} ms")
+    db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--url", help="existing database URL to benchmark instead of seeding SQLite")
+    args = parser.parse_args()
+
+    if args.url:
+        run(args.url, args.url.split("@")[-1])
+        return
+    for order_count in args.orders:
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            started = time.perf_counter()
+            seed(create_engine(url), order_count)
+            print(f"\nseeded {order_count:,} orders in {time.perf_counter() - started:.0f} s")
+            run(url, f"sqlite {order_count:,}")
+
+if __name__ == "__main__":
+    main()
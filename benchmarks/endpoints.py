@@ -0,0 +1,258 @@
+"""Benchmark every API endpoint and fail on latency/throughput regressions.
+
+Optionally seeds the configured database through demo_data.py, starts uvicorn
+(or uses --base-url), then drives each endpoint in turn at the given
+concurrency and reports throughput and p50/p95/p99 latency per endpoint.
+
+    python benchmarks/endpoints.py --seed-orders 1000000 --seed-products 5000 \\
+        --requests 2000 --concurrency 50 --output results.json
+    python benchmarks/endpoints.py --baseline benchmarks/baseline.json --tolerance 0.15
+
+With --baseline the run exits 1 when a tracked metric (--metrics, p95 latency
+and throughput by default) is worse than the baseline by more than the
+tolerance, or when an endpoint that had no errors in the baseline now has
+some. --update-baseline writes this run's results to the baseline file instead.
+
+The write scenarios create products and orders and raise stock levels, so use
+a dedicated database. Analytics caching is switched off in the server this
+script starts so the analytics numbers measure the queries (--analytics-cache
+keeps it on).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+import httpx
+
+from http_load import percentile, wait_until_ready
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_METRICS = ["p95_ms", "throughput_rps"]
+# Stock set by the inventory scenario so the order scenario never runs out
+BENCHMARK_STOCK = 1_000_000
+
+def seed_database(args):
+    # demo_data.py skips seeding when the database already has data
+    subprocess.run(
+        [sys.executable, "demo_data.py", "--orders", str(args.seed_orders), "--products", str(args.seed_products),
+         "--days", str(args.seed_days), "--workers", str(args.seed_workers), "--seed", "1"],
+        cwd=ROOT, check=True
+    )
+
+def scenarios(catalog, category_id, run_id):
+    # (name, number of requests or None for --requests, request factory, response hook).
+    # The factory maps the request index to (method, path, json body).
+    product_ids = [product["id"] for product in catalog]
+    prices = {product["id"]: product["price"] for product in catalog}
+    created = []
+    today = date.today()
+
+    def pick(i):
+        return product_ids[i % len(product_ids)]
+
+    def analytics_range(i):
+        # vary the range so repeated requests aren't all the same query
+        end = today - timedelta(days=i % 30)
+        return (end - timedelta(days=90)).isoformat(), end.isoformat()
+
+    def order(i):
+        items = [{"product_id": pick(i + offset), "quantity": 1, "unit_price": prices[pick(i + offset)]} for offset in range(1 + i % 3)]
+        subtotal = round(sum(item["unit_price"] for item in items), 2)
+        return {
+            "order_date": datetime.now().isoformat(), "status": "pending", "payment_status": "paid",
+            "subtotal": subtotal, "tax": 0.0, "shipping_cost": 0.0, "discount": 0.0, "total": subtotal,
+            "marketplace": ("amazon", "walmart", "direct")[i % 3], "items": items
+        }
+
+    def remember_product(response):
+        if response.status_code == 200:
+            created.append(response.json()["id"])
+
+    return [
+        ("products.list", None, lambda i: ("GET", f"/api/products/?skip={(i % 10) * 50}&limit=50", None), None),
+        ("products.get", None, lambda i: ("GET", f"/api/products/{pick(i)}", None), None),
+        ("products.create", None, lambda i: ("POST", "/api/products/", {
+            "sku": f"BENCH-{run_id}-{i}", "name": f"Benchmark product {i}", "price": 9.99, "category_id": category_id
+        }), remember_product),
+        ("products.update", lambda: len(created), lambda i: ("PUT", f"/api/products/{created[i]}", {"price": 10.99}), None),
+        ("products.delete", lambda: len(created), lambda i: ("DELETE", f"/api/products/{created[i]}", None), None),
+        ("inventory.update", None, lambda i: ("PUT", f"/api/inventory/{pick(i)}", {"quantity": BENCHMARK_STOCK, "note": "benchmark"}), None),
+        ("inventory.low_stock", None, lambda i: ("GET", "/api/inventory/low-stock", None), None),
+        ("orders.create", None, lambda i: ("POST", "/api/sales/orders", order(i)), None),
+        ("orders.list", None, lambda i: ("GET", f"/api/sales/orders?limit=50&marketplace={('amazon', 'walmart', 'direct')[i % 3]}", None), None),
+        ("analytics.revenue", None, lambda i: ("GET", "/api/analytics/revenue?start_date={}&end_date={}&group_by=week".format(*analytics_range(i)), None), None),
+        ("analytics.sales_by_category", None, lambda i: ("GET", "/api/analytics/sales-by-category?start_date={}&end_date={}".format(*analytics_range(i)), None), None),
+        ("analytics.marketplace_performance", None, lambda i: ("GET", "/api/analytics/marketplace-performance?start_date={}&end_date={}".format(*analytics_range(i)), None), None),
+    ]
+
+async def drive(client, total, concurrency, make_request, on_response=None):
+    latencies = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal errors, next_index
+        while next_index < total:
+            index = next_index
+            next_index += 1
+            method, path, body = make_request(index)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                latencies.append((time.perf_counter() - started) * 1000)
+                if response.status_code >= 400:
+                    errors += 1
+                elif on_response:
+                    on_response(response)
+            except httpx.HTTPError:
+                latencies.append((time.perf_counter() - started) * 1000)
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+    return latencies, errors, time.perf_counter() - started
+
+def summarize(latencies, errors, elapsed):
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+async def run_suite(base_url, args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        catalog = (await client.get("/api/products/", params={"limit": 500})).json()
+        categories = (await client.get("/api/products/categories/")).json()
+        if not catalog or not categories:
+            raise RuntimeError("the database has no products, seed it first (--seed-orders)")
+
+        results = {}
+        warmup_done = False
+        for name, count, make_request, on_response in scenarios(catalog, categories[0]["id"], uuid.uuid4().hex[:8]):
+            if args.only and name not in args.only:
+                continue
+            total = count() if count else args.requests
+            if total == 0:
+                print(f"{name:<36} skipped (nothing to act on)")
+                continue
+            if not warmup_done:
+                # prime connections and the server's pools once
+                await drive(client, min(100, args.requests), args.concurrency, lambda i: ("GET", "/", None))
+                warmup_done = True
+            latencies, errors, elapsed = await drive(client, total, args.concurrency, make_request, on_response)
+            results[name] = summarize(latencies, errors, elapsed)
+            row = results[name]
+            print(
+                f"{name:<36} {row['throughput_rps']:>8.0f} {row['p50_ms']:>8.1f} "
+                f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['errors']:>7}"
+            )
+    return results
+
+def compare(results, baseline, metrics, tolerance):
+    # Returns human readable regressions. Latency metrics (*_ms) regress when
+    # they go up, throughput when it goes down.
+    regressions = []
+    for name, base in baseline.get("endpoints", {}).items():
+        current = results.get(name)
+        if current is None:
+            continue
+        for metric in metrics:
+            if metric not in base or metric not in current or not base[metric]:
+                continue
+            change = (current[metric] - base[metric]) / base[metric]
+            worse = change > tolerance if metric.endswith("_ms") else -change > tolerance
+            if worse:
+                regressions.append(f"{name} {metric}: {base[metric]} -> {current[metric]} ({change:+.0%})")
+        if current["errors"] and not base.get("errors"):
+            regressions.append(f"{name} errors: 0 -> {current['errors']}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default=None, help="benchmark an already running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=1000, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--only", nargs="*", default=None, help="endpoint names to run, e.g. orders.create analytics.revenue")
+    parser.add_argument("--analytics-cache", action="store_true", help="leave the analytics cache on in the started server")
+    parser.add_argument("--seed-orders", type=int, default=0, help="seed the database through demo_data.py first")
+    parser.add_argument("--seed-products", type=int, default=1000)
+    parser.add_argument("--seed-days", type=int, default=365)
+    parser.add_argument("--seed-workers", type=int, default=4)
+    parser.add_argument("--output", default=None, help="write results as JSON")
+    parser.add_argument("--baseline", default=None, help="JSON results to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="write this run to --baseline instead of comparing")
+    parser.add_argument("--metrics", default=",".join(DEFAULT_METRICS), help="comma separated metrics checked against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative change before a metric counts as a regression")
+    args = parser.parse_args()
+
+    if args.seed_orders:
+        seed_database(args)
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        env = dict(os.environ)
+        if not args.analytics_cache:
+            env["ANALYTICS_CACHE_BACKEND"] = "off"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+            cwd=ROOT, env=env
+        )
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        wait_until_ready(base_url)
+        print(f"{'endpoint':<36} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        results = asyncio.run(run_suite(base_url, args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "analytics_cache": args.analytics_cache,
+            "db_async": os.getenv("DB_ASYNC", "false"),
+            "python": platform.python_version(),
+            "host": platform.node(),
+        },
+        "endpoints": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline and args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, [m.strip() for m in args.metrics.split(",") if m.strip()], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%} of {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} of {args.baseline}")
+
+if __name__ == "__main__":
+    main()
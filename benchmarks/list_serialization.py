@@ -0,0 +1,140 @@
+"""CPU time per 1000 rows of the list endpoints: ORM + response_model vs plain rows.
+
+"before" is what the list routes used to do: load ORM objects (orders with
+selectinload'ed items), let FastAPI validate them against the orm_mode
+response_model and encode the result with the stdlib JSON encoder. "after"
+is the current read path: plain column rows from the service, encoded by
+services.fast_json. Both outputs are checked to decode to the same JSON.
+
+    python benchmarks/list_serialization.py --orders 20000 --page 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, selectinload
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.py needs credentials even though we bind our own engine
+for key in ("DB_USER", "DB_PASSWORD", "DB_HOST", "DB_NAME"):
+    os.environ.setdefault(key, "benchmark")
+
+from database import Base  # noqa: E402
+from models.product import Category, Product  # noqa: E402
+from models.inventory import Inventory, InventoryTransaction  # noqa: E402
+from models.sales import Order, OrderItem  # noqa: E402
+from schemas import inventory as inventory_schemas, sales as sales_schemas  # noqa: E402
+from services import fast_json, inventory_service, sales_service  # noqa: E402
+
+def seed(engine, order_count, product_count):
+    Base.metadata.create_all(engine)
+    now = datetime(2024, 6, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(Category), [{"name": "Category"}])
+        conn.execute(insert(Product), [{"sku": f"SKU-{i}", "name": f"Product {i}", "price": 10.0, "category_id": 1} for i in range(product_count)])
+        conn.execute(insert(Inventory), [
+            {"product_id": i + 1, "quantity": 100, "low_stock_threshold": 10, "last_restock_date": now, "created_at": now, "updated_at": now}
+            for i in range(product_count)
+        ])
+        orders, items, transactions = [], [], []
+        for i in range(order_count):
+            when = now - timedelta(minutes=i)
+            orders.append({
+                "id": i + 1, "order_number": f"ORD-{i + 1:08X}", "order_date": when, "status": "delivered",
+                "payment_status": "paid", "subtotal": 30.5, "tax": 2.44, "shipping_cost": 4.99, "discount": 0.0,
+                "total": 37.93, "marketplace": "amazon", "created_at": when, "updated_at": when
+            })
+            for line in range(2):
+                product_id = (i * 2 + line) % product_count + 1
+                items.append({"order_id": i + 1, "product_id": product_id, "quantity": 1 + line, "unit_price": 10.17, "subtotal": 10.17 * (1 + line), "created_at": when})
+                transactions.append({"product_id": product_id, "quantity_change": -1 - line, "transaction_type": "sale", "reference_id": f"ORD-{i + 1:08X}", "created_at": when})
+        conn.execute(insert(Order), orders)
+        conn.execute(insert(OrderItem), items)
+        conn.execute(insert(InventoryTransaction), transactions)
+
+def orm_orders(db, page):
+    return db.query(Order).options(selectinload(Order.items)).order_by(Order.order_date.desc(), Order.id.desc()).limit(page).all()
+
+def orm_inventory(db, page):
+    return db.query(Inventory).limit(page).all()
+
+def orm_transactions(db, page):
+    return db.query(InventoryTransaction).order_by(InventoryTransaction.created_at.desc(), InventoryTransaction.id.desc()).limit(page).all()
+
+SCENARIOS = [
+    # name, response model, old ORM load, current service call
+    ("GET /api/sales/orders", sales_schemas.Order, orm_orders, lambda db, page: sales_service.get_orders(db, limit=page)),
+    ("GET /api/inventory/", inventory_schemas.Inventory, orm_inventory, lambda db, page: inventory_service.get_all_inventory(db, 0, page)),
+    ("GET /api/inventory/transactions", inventory_schemas.InventoryTransaction, orm_transactions, lambda db, page: inventory_service.get_inventory_transactions(db, limit=page)),
+]
+
+def measure(engine, load, encode, page, repeat):
+    # Best CPU seconds over repeat runs for (load, encode), each run on a
+    # fresh session so nothing is served from a warm identity map
+    best_load = best_encode = float("inf")
+    body = None
+    for _ in range(repeat):
+        with Session(engine) as db:
+            started = time.process_time()
+            rows = load(db, page)
+            loaded = time.process_time()
+            body = encode(rows)
+            finished = time.process_time()
+        best_load = min(best_load, loaded - started)
+        best_encode = min(best_encode, finished - loaded)
+    return best_load, best_encode, body
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--page", type=int, default=1000, help="rows per list request")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--url", help="existing, seeded database instead of a throwaway SQLite file")
+    args = parser.parse_args()
+
+    if args.url:
+        engine = create_engine(args.url)
+    else:
+        path = os.path.join(tempfile.mkdtemp(), "list_serialization.db")
+        engine = create_engine(f"sqlite:///{path}")
+        print(f"Seeding {args.orders} orders and {args.products} products")
+        seed(engine, args.orders, args.products)
+
+    loop = asyncio.new_event_loop()
+    print(f"fast JSON encoder: {'orjson' if fast_json.orjson else 'json (orjson not installed)'}")
+    print(f"{'endpoint':<32} {'path':<7} {'load ms':>9} {'encode ms':>10} {'total ms':>9}  (CPU per 1000 rows)")
+    mismatches = 0
+    for name, model, orm_load, service_load in SCENARIOS:
+        field = create_response_field(name="Response_" + model.__name__, type_=List[model])
+
+        def before_encode(rows):
+            # FastAPI's own response_model handling, then JSONResponse rendering
+            content = loop.run_until_complete(serialize_response(field=field, response_content=rows, is_coroutine=True))
+            return JSONResponse(content).body
+
+        results = {}
+        for path, load, encode in (("before", orm_load, before_encode), ("after", service_load, fast_json.dumps)):
+            load_s, encode_s, body = measure(engine, load, encode, args.page, args.repeat)
+            results[path] = body
+            scale = 1000 / max(1, len(json.loads(body)))
+            print(f"{name:<32} {path:<7} {load_s * 1000 * scale:>9.1f} {encode_s * 1000 * scale:>10.1f} {(load_s + encode_s) * 1000 * scale:>9.1f}")
+        if json.loads(results["before"]) != json.loads(results["after"]):
+            print(f"{name}: response bodies differ")
+            mismatches += 1
+    loop.close()
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Measure time-to-first-request of a fresh worker under different startup settings.
+
+For each configuration starts uvicorn, then reports how long until the
+process accepts requests and how long until (and how slowly) the first real
+API request completes. Every configuration is run --runs times and the median
+is printed.
+
+    python benchmarks/startup_time.py --runs 5
+
+Configurations: schema creation on/off (DB_CREATE_ALL) x warm-up on/off
+(DB_WARMUP). Point .env at a database that already has its schema.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIGURATIONS = [
+    ("create_all", {"DB_CREATE_ALL": "true", "DB_WARMUP": "false"}),
+    ("create_all + warm-up", {"DB_CREATE_ALL": "true", "DB_WARMUP": "true"}),
+    ("migrations", {"DB_CREATE_ALL": "false", "DB_WARMUP": "false"}),
+    ("migrations + warm-up", {"DB_CREATE_ALL": "false", "DB_WARMUP": "true"}),
+]
+FIRST_REQUEST = "/api/products/?limit=20"
+
+def measure(app, port, settings):
+    # Returns (seconds until "/" answers, seconds until the first API
+    # response, latency of that first API request in seconds)
+    env = dict(os.environ, **settings)
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"server exited with {server.returncode}")
+            try:
+                if httpx.get(base_url + "/", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                time.sleep(0.01)
+        ready = time.perf_counter() - started
+        request_started = time.perf_counter()
+        response = httpx.get(base_url + FIRST_REQUEST, timeout=60)
+        response.raise_for_status()
+        first_request = time.perf_counter() - request_started
+        return ready, time.perf_counter() - started, first_request
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--app", default="main:app", help="uvicorn app to start")
+    args = parser.parse_args()
+
+    print(f"{'configuration':<22} {'ready s':>8} {'first response s':>17} {'first request ms':>17}")
+    for name, settings in CONFIGURATIONS:
+        samples = [measure(args.app, args.port, settings) for _ in range(args.runs)]
+        ready, total, first = (statistics.median(values) for values in zip(*samples))
+        print(f"{name:<22} {ready:>8.2f} {total:>17.2f} {first * 1000:>17.1f}")
+
+if __name__ == "__main__":
+    main()
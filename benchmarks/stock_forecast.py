@@ -0,0 +1,136 @@
+"""Time GET /api/inventory/forecast's service call for every SKU.
+
+Seeds a throwaway SQLite database with --products products and a month of
+`sale` ledger rows, then times:
+  * a cold call: loading the window's daily sales plus the forecast
+  * a call after a ledger write: inventory re-read and recomputed
+  * a call with nothing changed: served from the cache
+and checks velocities and days of cover of a sample of products against a
+plain Python computation over their ledger rows.
+
+    python benchmarks/stock_forecast.py --products 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.py needs credentials even though we bind our own engine
+for key in ("DB_USER", "DB_PASSWORD", "DB_HOST", "DB_NAME"):
+    os.environ.setdefault(key, "benchmark")
+# the catalog version poller would connect to that database
+os.environ.setdefault("CATALOG_CACHE", "false")
+
+from database import Base  # noqa: E402
+from models.product import Category, Product  # noqa: E402
+from models.inventory import Inventory, InventoryTransaction  # noqa: E402
+from services import inventory_service, stock_forecast  # noqa: E402
+
+CHUNK = 200_000
+
+def seed(engine, product_count, days, sales_per_day):
+    Base.metadata.create_all(engine)
+    rng = np.random.default_rng(42)
+    now = datetime.now()
+    today = datetime.combine(date.today(), datetime.min.time())
+    with engine.begin() as conn:
+        conn.execute(insert(Category), [{"name": "Category"}])
+        conn.execute(insert(Product), [
+            {"sku": f"SKU-{i}", "name": f"Product {i}", "price": 10.0, "category_id": 1, "created_at": now, "updated_at": now}
+            for i in range(product_count)
+        ])
+        quantities = rng.integers(0, 500, product_count)
+        conn.execute(insert(Inventory), [
+            {"product_id": i + 1, "quantity": int(quantities[i]), "low_stock_threshold": 10, "created_at": now, "updated_at": now}
+            for i in range(product_count)
+        ])
+        # a few fast movers, most products selling now and then, today included
+        rates = rng.pareto(1.5, product_count) * sales_per_day
+        counts = rng.poisson(np.repeat(rates, days + 1))
+        lines = np.flatnonzero(counts)
+        products = lines // (days + 1) + 1
+        offsets = lines % (days + 1) - days
+        seconds = rng.integers(0, 86400, len(lines))
+        for start in range(0, len(lines), CHUNK):
+            conn.execute(insert(InventoryTransaction), [
+                {"product_id": int(products[i]), "quantity_change": -int(counts[lines[i]]), "transaction_type": "sale",
+                 "created_at": min(now, today + timedelta(days=int(offsets[i]), seconds=int(seconds[i])))}
+                for i in range(start, min(start + CHUNK, len(lines)))
+            ])
+    return len(lines)
+
+def reference(db, product_id, window):
+    # (velocity, velocity_long) from the raw ledger rows of one product
+    today = datetime.combine(date.today(), datetime.min.time())
+    rows = db.execute(select(InventoryTransaction.quantity_change, InventoryTransaction.created_at).where(
+        InventoryTransaction.product_id == product_id,
+        InventoryTransaction.transaction_type == "sale",
+        InventoryTransaction.created_at >= today - timedelta(days=window),
+        InventoryTransaction.created_at < today
+    )).all()
+    short_days = min(stock_forecast.SHORT_WINDOW_DAYS, window)
+    velocity_long = -sum(change for change, _ in rows) / window
+    velocity_short = -sum(change for change, created_at in rows if created_at >= today - timedelta(days=short_days)) / short_days
+    return max(velocity_short, velocity_long), velocity_long
+
+def timed(session_factory, **kwargs):
+    with session_factory() as db:
+        started = time.perf_counter()
+        forecast = stock_forecast.get_stock_forecast(db, **kwargs)
+        return time.perf_counter() - started, forecast
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--sales-per-day", type=float, default=0.2, help="typical sale rows per product and day")
+    parser.add_argument("--window", type=int, default=stock_forecast.FORECAST_WINDOW_DAYS)
+    parser.add_argument("--url", help="existing, seeded database instead of a throwaway SQLite file")
+    args = parser.parse_args()
+
+    if args.url:
+        engine = create_engine(args.url)
+    else:
+        path = os.path.join(tempfile.mkdtemp(), "stock_forecast.db")
+        engine = create_engine(f"sqlite:///{path}")
+        started = time.perf_counter()
+        rows = seed(engine, args.products, args.window, args.sales_per_day)
+        print(f"Seeded {args.products} products and {rows} sale rows in {time.perf_counter() - started:.1f}s")
+    session_factory = sessionmaker(bind=engine)
+    # results computed while the ledger head settles are redone once, skip the wait
+    inventory_service.LEDGER_SETTLE_SECONDS = 0
+
+    cold, forecast = timed(session_factory, window_days=args.window)
+    with session_factory() as db:
+        inventory_service.update_inventory(db, forecast["data"][0]["product_id"], 1000)
+    changed, _ = timed(session_factory, window_days=args.window)
+    # the result above was computed before the new head settled, this redoes it
+    timed(session_factory, window_days=args.window)
+    cached, forecast = timed(session_factory, window_days=args.window)
+    print(f"{len(forecast['data'])} SKUs")
+    print(f"{'cold (daily sales + forecast)':<32} {cold * 1000:>8.0f} ms")
+    print(f"{'after a ledger write':<32} {changed * 1000:>8.0f} ms")
+    print(f"{'unchanged (cached)':<32} {cached * 1000:>8.0f} ms")
+
+    mismatches = 0
+    rows = forecast["data"]
+    sample = [rows[i] for i in np.random.default_rng(7).choice(len(rows), min(200, len(rows)), replace=False)]
+    with session_factory() as db:
+        for row in sample:
+            velocity, velocity_long = reference(db, row["product_id"], args.window)
+            cover = round(max(row["quantity"], 0) / velocity, 1) if velocity else None
+            if row["velocity"] != round(velocity, 3) or row["velocity_long"] != round(velocity_long, 3) or row["days_of_cover"] != cover:
+                print(f"product {row['product_id']}: {row} vs velocity {velocity:.3f}, velocity_long {velocity_long:.3f}")
+                mismatches += 1
+    print(f"checked {len(sample)} products, {mismatches} mismatches")
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+from fastapi import Request
 import urllib.parse
 from dotenv import load_dotenv
 import os
 
+from pool_metrics import InstrumentedQueuePool, InstrumentedAsyncQueuePool
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -14,22 +18,125 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_HOST = os.getenv("DB_HOST")
 DB_NAME = os.getenv("DB_NAME")
 
-# URL encode the password to handle special characters
-encoded_password = urllib.parse.quote_plus(DB_PASSWORD)
+# Optional read-only replica for analytics and list endpoints. Credentials and
+# database name default to the primary's, leave DB_REPLICA_HOST unset to read
+# from the primary.
+DB_REPLICA_HOST = os.getenv("DB_REPLICA_HOST")
+DB_REPLICA_USER = os.getenv("DB_REPLICA_USER", DB_USER)
+DB_REPLICA_PASSWORD = os.getenv("DB_REPLICA_PASSWORD", DB_PASSWORD)
+DB_REPLICA_NAME = os.getenv("DB_REPLICA_NAME", DB_NAME)
+
+# Serve requests from an AsyncSession on the event loop instead of a
+# threadpool. The sync engine below is still used by scripts and create_all.
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+# Connection pool settings, per worker process. Recycle below MySQL's
+# wait_timeout and pre-ping so stale connections are replaced before use.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Schema management at startup. With DB_CREATE_ALL off (Alembic owns the
+# schema, see migrations/) the app doesn't touch the database until the
+# first request, or until the warm-up if DB_WARMUP is on.
+DB_CREATE_ALL = os.getenv("DB_CREATE_ALL", "true").lower() in ("1", "true", "yes")
+DB_WARMUP = os.getenv("DB_WARMUP", "false").lower() in ("1", "true", "yes")
+DB_WARMUP_CONNECTIONS = int(os.getenv("DB_WARMUP_CONNECTIONS", str(DB_POOL_SIZE)))
+
+POOL_OPTIONS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
+def _database_url(driver, user, password, host, name):
+    # URL encode the password to handle special characters
+    encoded_password = urllib.parse.quote_plus(password)
+    return f"mysql+{driver}://{user}:{encoded_password}@{host}/{name}"
 
 # Create database URL
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{DB_USER}:{encoded_password}@{DB_HOST}/{DB_NAME}"
+SQLALCHEMY_DATABASE_URL = _database_url("pymysql", DB_USER, DB_PASSWORD, DB_HOST, DB_NAME)
+SQLALCHEMY_ASYNC_DATABASE_URL = _database_url("aiomysql", DB_USER, DB_PASSWORD, DB_HOST, DB_NAME)
 
 # Create engine and session
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, poolclass=InstrumentedQueuePool, **POOL_OPTIONS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if DB_REPLICA_HOST:
+    read_engine = create_engine(
+        _database_url("pymysql", DB_REPLICA_USER, DB_REPLICA_PASSWORD, DB_REPLICA_HOST, DB_REPLICA_NAME),
+        poolclass=InstrumentedQueuePool, **POOL_OPTIONS
+    )
+else:
+    read_engine = engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+def reads_replica(db) -> bool:
+    # Whether a sync session (or the one behind AsyncSession.run_sync) is bound
+    # to the replica, whose reads can lag the primary's
+    if not DB_REPLICA_HOST:
+        return False
+    bind = db.get_bind()
+    return bind is read_engine or (DB_ASYNC and bind is async_read_engine.sync_engine)
+
+def wants_primary(request: Request) -> bool:
+    # Per-request override so a client can read its own writes right after making them
+    return request.headers.get("X-Read-Your-Writes", "").lower() in ("1", "true", "yes")
+
 Base = declarative_base()
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+if DB_ASYNC:
+    # aiomysql is only needed when async mode is switched on
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_engine = create_async_engine(SQLALCHEMY_ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncQueuePool, **POOL_OPTIONS)
+    # no expire on commit: responses are serialized after the session work is done
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    if DB_REPLICA_HOST:
+        async_read_engine = create_async_engine(
+            _database_url("aiomysql", DB_REPLICA_USER, DB_REPLICA_PASSWORD, DB_REPLICA_HOST, DB_REPLICA_NAME),
+            poolclass=InstrumentedAsyncQueuePool, **POOL_OPTIONS
+        )
+    else:
+        async_read_engine = async_engine
+    AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+    # Dependency to get DB session
+    async def get_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    # Dependency for read-only endpoints, routed to the replica when there is one
+    async def get_read_db(request: Request):
+        session_factory = AsyncSessionLocal if wants_primary(request) else AsyncReadSessionLocal
+        async with session_factory() as db:
+            yield db
+else:
+    # Dependency to get DB session
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    # Dependency for read-only endpoints, routed to the replica when there is one
+    def get_read_db(request: Request):
+        db = SessionLocal() if wants_primary(request) else ReadSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+async def run_db(db, fn, *args, **kwargs):
+    # Run a sync service function against whichever session get_db handed out.
+    # AsyncSession.run_sync drives it on the event loop through the async driver,
+    # a plain Session runs it in the threadpool like a sync endpoint would.
+    if DB_ASYNC:
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
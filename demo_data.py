@@ -1,8 +1,14 @@
+import argparse
+import itertools
+import math
+import multiprocessing
 import random
-from datetime import datetime, timedelta
-import uuid
 import sys
-from sqlalchemy.orm import Session
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, insert
 
 # Add the parent directory to sys.path to allow importing the app
 sys.path.append("..")
@@ -11,6 +17,7 @@ from database import SessionLocal, engine, Base
 from models.product import Category, Product
 from models.inventory import Inventory, InventoryTransaction
 from models.sales import Order, OrderItem
+from services import rollup_service
 
 # Create database tables if they don't exist
 Base.metadata.create_all(bind=engine)
@@ -65,19 +72,143 @@ PRODUCTS = {
 
 # Marketplace options
 MARKETPLACES = ["amazon", "walmart", "direct"]
+DEFAULT_MARKETPLACE_MIX = {"amazon": 1, "walmart": 1, "direct": 1}
 
 # Order status options
 ORDER_STATUS = ["pending", "processing", "shipped", "delivered", "cancelled"]
 PAYMENT_STATUS = ["pending", "paid", "failed", "refunded"]
 
-def generate_sku(category_name, product_name):
-    """Generate a unique SKU based on category and product name"""
+def generate_sku(category_name, product_name, index):
+    """Generate a unique SKU based on category, product name and catalog position"""
     category_prefix = ''.join([word[0] for word in category_name.split()]).upper()
     product_prefix = ''.join([word[0] for word in product_name.split()]).upper()
-    random_suffix = str(random.randint(1000, 9999))
-    return f"{category_prefix}-{product_prefix}-{random_suffix}"
+    return f"{category_prefix}-{product_prefix}-{index:06d}"
 
-def create_demo_data():
+# Rows per multi-row INSERT
+INSERT_CHUNK = 5000
+# Orders generated (and committed) per unit of work handed to a worker
+ORDERS_PER_TASK = 20000
+LOW_STOCK_THRESHOLD = 10
+
+# Set once per worker by _init_worker
+_plan: Dict = {}
+
+def parse_marketplace_mix(value: str) -> Dict[str, float]:
+    """Parse "amazon=5,walmart=3,direct=2" into relative weights"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in MARKETPLACES:
+            raise argparse.ArgumentTypeError(f"Unknown marketplace : {name}")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid weight for {name} : {weight}")
+    if not mix or sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("Marketplace mix needs at least one positive weight")
+    return mix
+
+def _day_weights(start: datetime, days: int, seasonality: float) -> List[float]:
+    # Relative order volume per day: busier weekends and a yearly curve peaking
+    # around late November, both scaled by seasonality (0 = flat, 1 = strong)
+    weights = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        weekly = 1 + 0.3 * seasonality * (day.weekday() >= 5)
+        yearly = 1 + 0.5 * seasonality * math.cos(2 * math.pi * (day.timetuple().tm_yday - 330) / 365)
+        weights.append(weekly * yearly)
+    return weights
+
+def _insert_chunked(connection, table, rows: List[Dict]) -> None:
+    for start in range(0, len(rows), INSERT_CHUNK):
+        connection.execute(insert(table), rows[start:start + INSERT_CHUNK])
+
+def _init_worker(plan: Dict, subprocess: bool) -> None:
+    global _plan
+    _plan = plan
+    if subprocess:
+        # don't reuse connections inherited from the parent over fork
+        engine.dispose(close=False)
+
+def _generate_orders(task: Tuple[int, int, int]) -> Tuple[int, Counter]:
+    # Build and insert one batch of orders with their items and sale ledger
+    # entries in a single transaction. Order ids are pre-assigned per task so
+    # items can reference them without reading ids back.
+    first_order_id, count, seed = task
+    rng = random.Random(seed)
+    plan = _plan
+    start, products = plan["start"], plan["products"]
+    days = rng.choices(range(plan["days"]), cum_weights=plan["day_weights"], k=count)
+    marketplaces = rng.choices(plan["marketplaces"], cum_weights=plan["marketplace_weights"], k=count)
+
+    orders, items, transactions = [], [], []
+    sold = Counter()
+    for offset in range(count):
+        order_id = first_order_id + offset
+        order_date = start + timedelta(days=days[offset], seconds=rng.randrange(86400))
+        # a prefix the API never hands out, so live orders can't collide with seeded ones
+        order_number = f"DEMO-{order_id:010d}"
+        status = rng.choice(ORDER_STATUS)
+
+        subtotal = 0
+        for product_id, price in rng.choices(products, cum_weights=plan["product_weights"], k=rng.randint(1, 5)):
+            quantity = rng.randint(1, 3)
+            item_subtotal = price * quantity
+            subtotal += item_subtotal
+            items.append({
+                "order_id": order_id,
+                "product_id": product_id,
+                "quantity": quantity,
+                "unit_price": price,
+                "subtotal": item_subtotal,
+                "created_at": order_date
+            })
+            if status != "cancelled":
+                sold[product_id] += quantity
+                transactions.append({
+                    "product_id": product_id,
+                    "quantity_change": -quantity,
+                    "transaction_type": "sale",
+                    "reference_id": order_number,
+                    "note": None,
+                    "created_at": order_date
+                })
+
+        tax = round(subtotal * 0.08, 2)  # 8% tax
+        shipping = 5.99 if subtotal < 50 else 0  # Free shipping over $50
+        discount = round(subtotal * rng.choice([0, 0, 0, 0.05, 0.1]), 2)  # Random discount
+        orders.append({
+            "id": order_id,
+            "order_number": order_number,
+            "order_date": order_date,
+            "status": status,
+            "payment_status": rng.choice(PAYMENT_STATUS),
+            "subtotal": subtotal,
+            "tax": tax,
+            "shipping_cost": shipping,
+            "discount": discount,
+            "total": subtotal + tax + shipping - discount,
+            "marketplace": marketplaces[offset],
+            "created_at": order_date,
+            "updated_at": order_date
+        })
+
+    with engine.begin() as connection:
+        _insert_chunked(connection, Order.__table__, orders)
+        _insert_chunked(connection, OrderItem.__table__, items)
+        _insert_chunked(connection, InventoryTransaction.__table__, transactions)
+    return count, sold
+
+def generate(
+    products: int = 25,
+    orders: int = 100,
+    days: int = 90,
+    marketplace_mix: Optional[Dict[str, float]] = None,
+    seasonality: float = 0.0,
+    workers: int = 1,
+    seed: Optional[int] = None
+):
     db = SessionLocal()
     try:
         # Check if data already exists
@@ -85,9 +216,13 @@ def create_demo_data():
         if existing_categories > 0:
             print("Data already exists in the database so skipping the insertion of demo data")
             return
-        
-        print("Generating demo data")
-        
+
+        print(f"Generating {products} products and {orders} orders over {days} days")
+        rng = random.Random(seed)
+        started = time.monotonic()
+        start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+        opening_date = start - timedelta(days=1)
+
         # Create categories
         db_categories = {}
         for category_data in CATEGORIES:
@@ -95,117 +230,126 @@ def create_demo_data():
             db.add(category)
             db.flush()  # Flush to get the ID
             db_categories[category.name] = category.id
-        
-        # Create products with inventory
-        db_products = []
-        for category_name, products in PRODUCTS.items():
-            category_id = db_categories[category_name]
-            
-            for product_data in products:
-                # Create product
-                product = Product(
-                    sku=generate_sku(category_name, product_data["name"]),
-                    name=product_data["name"],
-                    description=product_data["description"],
-                    price=product_data["price"],
-                    category_id=category_id,
-                    image_url=f"https://example.com/rand/images/{product_data['name'].lower().replace(' ', '-')}.jpg",
-                    is_active=True
-                )
-                db.add(product)
-                db.flush()  # Flush to get the ID
-                
-                # Create inventory
-                inventory = Inventory(product_id=product.id, quantity=random.randint(5, 100), low_stock_threshold=10, last_restock_date=datetime.now() - timedelta(days=random.randint(1, 30)))
-                db.add(inventory)
-                
-                # Add to product list for order generation
-                db_products.append((product.id, product.price))
-        
-        # Create orders with order items
-        for _ in range(100):  # Generate 100 orders
-            # Randomize order date within the last 3 months
-            order_date = datetime.now() - timedelta(days=random.randint(1, 90))
-            
-            # Generate random order data
-            subtotal = 0
-            items = []
-            
-            # Add 1-5 items to the order
-            for _ in range(random.randint(1, 5)):
-                product_id, price = random.choice(db_products)
-                quantity = random.randint(1, 3)
-                item_subtotal = price * quantity
-                subtotal += item_subtotal
-                
-                items.append({
-                    "product_id": product_id,
-                    "quantity": quantity,
-                    "unit_price": price,
-                    "subtotal": item_subtotal
-                })
-            
-            # Calculate order totals
-            tax = round(subtotal * 0.08, 2)  # 8% tax
-            shipping = 5.99 if subtotal < 50 else 0  # Free shipping over $50
-            discount = round(subtotal * random.choice([0, 0, 0, 0.05, 0.1]), 2)  # Random discount
-            total = subtotal + tax + shipping - discount
-            
-            # Create order
-            order = Order(
-                order_number=f"ORD-{uuid.uuid4().hex[:8].upper()}",
-                order_date=order_date,
-                status=random.choice(ORDER_STATUS),
-                payment_status=random.choice(PAYMENT_STATUS),
-                subtotal=subtotal,
-                tax=tax,
-                shipping_cost=shipping,
-                discount=discount,
-                total=total,
-                marketplace=random.choice(MARKETPLACES),
-                created_at=order_date,
-                updated_at=order_date
-            )
-            db.add(order)
-            db.flush()  # Flush to get the ID
-            
-            for item_data in items:
-                order_item = OrderItem(
-                    order_id=order.id,
-                    product_id=item_data["product_id"],
-                    quantity=item_data["quantity"],
-                    unit_price=item_data["unit_price"],
-                    subtotal=item_data["subtotal"],
-                    created_at=order_date
-                )
-                db.add(order_item)
-                
-                inventory = db.query(Inventory).filter(
-                    Inventory.product_id == item_data["product_id"]
-                ).first()
-                
-                if inventory and order.status != "cancelled":
-                    # Reduce inventory for non-cancelled orders
-                    inventory.quantity = max(0, inventory.quantity - item_data["quantity"])
-                    
-                    # Create inventory transaction
-                    transaction = InventoryTransaction(
-                        product_id=item_data["product_id"],
-                        quantity_change=-item_data["quantity"],
-                        transaction_type="sale",
-                        reference_id=order.order_number,
-                        created_at=order_date
-                    )
-                    db.add(transaction)
-        
+
+        # Create the catalog. Past the 25 base products every product is a
+        # "Series N" variant of one of them with a jittered price.
+        templates = [(category_name, product_data) for category_name, items in PRODUCTS.items() for product_data in items]
+        first_product_id = (db.query(func.max(Product.id)).scalar() or 0) + 1
+        product_rows = []
+        for index in range(products):
+            category_name, product_data = templates[index % len(templates)]
+            series = index // len(templates)
+            name = product_data["name"] if series == 0 else f"{product_data['name']} Series {series + 1}"
+            price = product_data["price"] if series == 0 else round(product_data["price"] * rng.uniform(0.8, 1.25), 2)
+            product_rows.append({
+                "id": first_product_id + index,
+                "sku": generate_sku(category_name, product_data["name"], index),
+                "name": name,
+                "description": product_data["description"],
+                "price": price,
+                "category_id": db_categories[category_name],
+                "image_url": f"https://example.com/rand/images/{name.lower().replace(' ', '-')}.jpg",
+                "is_active": True,
+                "created_at": opening_date,
+                "updated_at": opening_date
+            })
+        _insert_chunked(db.connection(), Product.__table__, product_rows)
+        # Workers insert over their own connections, so the catalog has to be committed first
+        db.commit()
+
+        # Skewed popularity so a few products sell far more than the long tail
+        catalog = [(row["id"], row["price"]) for row in product_rows]
+        rng.shuffle(catalog)
+        mix = marketplace_mix or DEFAULT_MARKETPLACE_MIX
+        plan = {
+            "start": start,
+            "days": days,
+            "day_weights": list(itertools.accumulate(_day_weights(start, days, seasonality))),
+            "products": catalog,
+            "product_weights": list(itertools.accumulate(1 / (rank + 1) ** 0.8 for rank in range(len(catalog)))),
+            "marketplaces": list(mix),
+            "marketplace_weights": list(itertools.accumulate(mix.values()))
+        }
+
+        first_order_id = (db.query(func.max(Order.id)).scalar() or 0) + 1
+        db.close()
+        tasks = [
+            (first_order_id + offset, min(ORDERS_PER_TASK, orders - offset), rng.randrange(2 ** 32))
+            for offset in range(0, orders, ORDERS_PER_TASK)
+        ]
+        sold = Counter()
+        created = 0
+        if workers > 1:
+            with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(plan, True)) as pool:
+                for count, task_sold in pool.imap_unordered(_generate_orders, tasks):
+                    created += count
+                    sold.update(task_sold)
+                    print(f"  {created}/{orders} orders")
+        else:
+            _init_worker(plan, False)
+            for task in tasks:
+                count, task_sold = _generate_orders(task)
+                created += count
+                sold.update(task_sold)
+                if len(tasks) > 1:
+                    print(f"  {created}/{orders} orders")
+
+        # Inventory is derived from the ledger: each product gets an opening
+        # purchase covering everything it sold plus what's left on hand, so
+        # quantity always equals the sum of its transactions and never went
+        # negative. Some products deliberately end up below the threshold.
+        inventory_rows, opening_rows = [], []
+        for product_id, _ in catalog:
+            quantity = rng.randint(0, 100)
+            inventory_rows.append({
+                "product_id": product_id,
+                "quantity": quantity,
+                "low_stock_threshold": LOW_STOCK_THRESHOLD,
+                "last_restock_date": opening_date,
+                # Core inserts skip the ORM event that normally keeps this in sync
+                "is_low_stock": quantity < LOW_STOCK_THRESHOLD,
+                "created_at": opening_date,
+                "updated_at": opening_date
+            })
+            opening_rows.append({
+                "product_id": product_id,
+                "quantity_change": quantity + sold[product_id],
+                "transaction_type": "purchase",
+                "reference_id": None,
+                "note": "Opening stock",
+                "created_at": opening_date
+            })
+
+        db = SessionLocal()
+        _insert_chunked(db.connection(), Inventory.__table__, inventory_rows)
+        _insert_chunked(db.connection(), InventoryTransaction.__table__, opening_rows)
+
+        # Orders are inserted directly here, so backfill the analytics rollups in one pass
+        rollup_service.rebuild_rollups(db)
+
         db.commit()
-        print("Demo data generation complete!")
-        
+        elapsed = time.monotonic() - started
+        print(f"Demo data generation complete! {created} orders in {elapsed:.1f}s ({created / max(elapsed, 0.001):.0f} orders/s)")
+
     except Exception as e:
         db.rollback()
         print(f"Error generating demo data: {e}")
     finally:
         db.close()
 
+def create_demo_data():
+    generate()
+
 if __name__ == "__main__":
-    create_demo_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate demo or load-test data")
+    parser.add_argument("--products", type=int, default=25, help="catalog size")
+    parser.add_argument("--orders", type=int, default=100, help="number of orders")
+    parser.add_argument("--days", type=int, default=90, help="orders are spread over this many days up to today")
+    parser.add_argument("--marketplace-mix", type=parse_marketplace_mix, default=None, help="relative weights, e.g. amazon=5,walmart=3,direct=2")
+    parser.add_argument("--seasonality", type=float, default=0.0, help="0 = flat, 1 = strong weekly/yearly swings")
+    parser.add_argument("--workers", type=int, default=1, help="processes inserting orders in parallel")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for reproducible data")
+    args = parser.parse_args()
+    if args.products < 1 or args.orders < 0 or args.days < 1:
+        parser.error("--products and --days must be positive, --orders can't be negative")
+    generate(args.products, args.orders, args.days, args.marketplace_mix, args.seasonality, args.workers, args.seed)
@@ -3,11 +3,10 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
-from database import engine, Base
-from routers import products, inventory, sales, analytics
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
+import database
+import warmup
+from routers import products, inventory, sales, analytics, jobs, internal
+from services import job_queue
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -23,6 +22,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -30,6 +30,22 @@ app.include_router(products.router)
 app.include_router(inventory.router)
 app.include_router(sales.router)
 app.include_router(analytics.router)
+app.include_router(jobs.router)
+app.include_router(internal.router)
+
+@app.on_event("startup")
+async def startup():
+    # Nothing here runs at import time, so importing the app never needs the database
+    if database.DB_CREATE_ALL:
+        # Create database tables
+        database.Base.metadata.create_all(bind=database.engine)
+    if database.DB_WARMUP:
+        elapsed = await warmup.warm_up()
+        print(f"Warm-up complete in {elapsed:.2f}s")
+
+@app.on_event("shutdown")
+def shutdown():
+    job_queue.shutdown()
 
 # Error handling
 @app.exception_handler(Exception)
@@ -0,0 +1,28 @@
+"""index order_items.order_id and order_items.product_id
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:05:12
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # MySQL already keeps implicit indexes for these foreign keys; the explicit
+    # ones replace them and give SQLite/Postgres the same plans
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+    op.create_index(op.f('ix_order_items_product_id'), 'order_items', ['product_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_order_items_product_id'), table_name='order_items')
+    op.drop_index(op.f('ix_order_items_order_id'), table_name='order_items')
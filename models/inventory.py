@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, String, Text
+from sqlalchemy import Column, Integer, Boolean, DateTime, ForeignKey, String, Text, Index, event
 from sqlalchemy.orm import relationship
 
 from database import Base
@@ -11,8 +11,26 @@ class Inventory(Base, TimestampMixin):
     quantity = Column(Integer, default=0)
     low_stock_threshold = Column(Integer, default=10)
     last_restock_date = Column(DateTime, nullable=True)    
+    # quantity < low_stock_threshold, persisted so the low-stock list is an index lookup
+    is_low_stock = Column(Boolean, default=False, nullable=False, index=True)
     product = relationship("Product", back_populates="inventory")
 
+    @staticmethod
+    def low_stock_after(quantity_change):
+        # SQL expression for the flag after quantity changes by quantity_change.
+        # Put it before the quantity assignment in an UPDATE (ordered_values):
+        # MySQL evaluates SET left to right against already-updated columns.
+        return (Inventory.quantity + quantity_change) < Inventory.low_stock_threshold
+
+# ORM writes (update_inventory, demo data) keep the flag in sync here, the
+# set-based stock updates in sales_service compute it in the same statement
+@event.listens_for(Inventory, "before_insert")
+@event.listens_for(Inventory, "before_update")
+def _sync_low_stock_flag(mapper, connection, target):
+    quantity = target.quantity if target.quantity is not None else 0
+    threshold = target.low_stock_threshold if target.low_stock_threshold is not None else 10
+    target.is_low_stock = quantity < threshold
+
 class InventoryTransaction(Base):
     __tablename__ = "inventory_transactions"
     id = Column(Integer, primary_key=True, index=True)
@@ -21,4 +39,11 @@ class InventoryTransaction(Base):
     transaction_type = Column(String(20), nullable=False)  # purchase, sale, adjustment, return
     reference_id = Column(String(100), nullable=True)
     note = Column(Text, nullable=True)
-    created_at = Column(DateTime, nullable=False)
\ No newline at end of file
+    created_at = Column(DateTime, nullable=False)
+
+    # composite indexes backing the (created_at desc, id desc) keyset pagination
+    __table_args__ = (
+        Index("ix_inventory_transactions_created_at_id", "created_at", "id"),
+        Index("ix_inventory_transactions_product_created_at_id", "product_id", "created_at", "id"),
+        Index("ix_inventory_transactions_type_created_at_id", "transaction_type", "created_at", "id"),
+    )
\ No newline at end of file
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, DateTime, String, Text
+
+from database import Base
+
+class Job(Base):
+    # Background analytics and export jobs (services.job_queue). The row is the
+    # job's shared state, so any worker can report on or cancel it; the result
+    # itself is a file under JOB_RESULTS_DIR.
+    __tablename__ = "jobs"
+
+    id = Column(String(32), primary_key=True)
+    kind = Column(String(50), nullable=False)
+    params = Column(Text, nullable=False)  # JSON
+    status = Column(String(20), nullable=False)  # queued, running, succeeded, failed, cancelled
+    error = Column(Text, nullable=True)
+    result_file = Column(String(255), nullable=True)
+    media_type = Column(String(50), nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    # the row and its result file are purged after this
+    expires_at = Column(DateTime, nullable=False, index=True)
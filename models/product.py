@@ -22,4 +22,12 @@ class Product(Base, TimestampMixin):
     image_url = Column(String(255), nullable=True)
     is_active = Column(Boolean, default=True)    
     category = relationship("Category", back_populates="products")
-    inventory = relationship("Inventory", back_populates="product", uselist=False)
\ No newline at end of file
+    inventory = relationship("Inventory", back_populates="product", uselist=False)
+
+class CatalogVersion(Base):
+    # Single row (id 1) bumped by every catalog write. Workers poll it to
+    # know when their catalog cache is stale.
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 
 from database import Base
@@ -19,12 +19,19 @@ class Order(Base, TimestampMixin):
     marketplace = Column(String(20), index=True)  # amazon, walmart, direct
     items = relationship("OrderItem", back_populates="order")
 
+    # composite indexes backing the (order_date desc, id desc) keyset pagination
+    __table_args__ = (
+        Index("ix_orders_order_date_id", "order_date", "id"),
+        Index("ix_orders_marketplace_order_date_id", "marketplace", "order_date", "id"),
+        Index("ix_orders_status_order_date_id", "status", "order_date", "id"),
+    )
+
 class OrderItem(Base):
     __tablename__ = "order_items"
     
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey("orders.id"))
-    product_id = Column(Integer, ForeignKey("products.id"))
+    product_id = Column(Integer, ForeignKey("products.id"), index=True)
     quantity = Column(Integer, nullable=False)
     unit_price = Column(Float, nullable=False)
     subtotal = Column(Float, nullable=False)
@@ -32,4 +39,41 @@ class OrderItem(Base):
     
     # Relationships
     order = relationship("Order", back_populates="items")
-    product = relationship("Product")
\ No newline at end of file
+    product = relationship("Product")
+
+    # Loads an order's lines in id order, and covers the per-product sums over
+    # a range of orders (top products by marketplace) without touching the rows
+    __table_args__ = (
+        Index("ix_order_items_order_id_covering", "order_id", "id", "product_id", "quantity", "subtotal"),
+    )
+
+class DailySalesRollup(Base):
+    __tablename__ = "daily_sales_rollup"
+
+    day = Column(Date, primary_key=True)
+    marketplace = Column(String(20), primary_key=True)
+    revenue = Column(Float, nullable=False, default=0.0)
+    order_count = Column(Integer, nullable=False, default=0)
+    # running totals of the cancelled share, kept in sync by update_order_status
+    cancelled_revenue = Column(Float, nullable=False, default=0.0)
+    cancelled_order_count = Column(Integer, nullable=False, default=0)
+
+class DailyProductSalesRollup(Base):
+    __tablename__ = "daily_product_sales_rollup"
+
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    total_sales = Column(Float, nullable=False, default=0.0)
+    units_sold = Column(Integer, nullable=False, default=0)
+    line_count = Column(Integer, nullable=False, default=0)
+
+class MonthlyProductSalesRollup(Base):
+    # Same sums as DailyProductSalesRollup per calendar month (month = its
+    # first day), so long ranges read one row per product and month
+    __tablename__ = "monthly_product_sales_rollup"
+
+    month = Column(Date, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    total_sales = Column(Float, nullable=False, default=0.0)
+    units_sold = Column(Integer, nullable=False, default=0)
+    line_count = Column(Integer, nullable=False, default=0)
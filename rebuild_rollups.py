@@ -0,0 +1,23 @@
+from database import SessionLocal, engine, Base
+from models.sales import DailySalesRollup, DailyProductSalesRollup, MonthlyProductSalesRollup
+from services import rollup_service, analytics_cache
+
+# Create the rollup tables if they don't exist yet
+Base.metadata.create_all(bind=engine, tables=[DailySalesRollup.__table__, DailyProductSalesRollup.__table__, MonthlyProductSalesRollup.__table__])
+
+def rebuild():
+    db = SessionLocal()
+    try:
+        print("Rebuilding daily sales rollups from orders")
+        rollup_service.rebuild_rollups(db)
+        db.commit()
+        analytics_cache.clear()
+        print("Rollup rebuild complete!")
+    except Exception as e:
+        db.rollback()
+        print(f"Error rebuilding rollups: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild()
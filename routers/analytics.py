@@ -1,34 +1,75 @@
 from datetime import date
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from database import get_db
-from schemas.analytics import RevenueAnalytics, CategorySalesResponse
-from services import analytics_service
+from database import get_read_db, run_db
+from schemas.analytics import RevenueAnalytics, CategorySalesResponse, TopProductsResponse
+from services import analytics_cache, analytics_service, etags
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
+# The reports are tagged with a hash of their result. A cached result carries
+# its hash, so a matching If-None-Match is answered from the cache entry alone;
+# entries are dropped when orders in their range change.
+async def _cached_etag(fn, *args):
+    # the redis backend does network I/O, keep it off the event loop
+    result_hash = await run_in_threadpool(analytics_cache.cached_hash, fn, *args)
+    return etags.make_etag(result_hash) if result_hash else None
+
+def _tagged(response: Response, result):
+    response.headers["ETag"] = etags.make_etag(analytics_cache.result_hash(result))
+    return result
+
 @router.get("/revenue", response_model=RevenueAnalytics)
-def get_revenue_analytics(
+async def get_revenue_analytics(
+    request: Request,
+    response: Response,
     start_date: date,
     end_date: date,
     group_by: str = Query("day", enum=["day", "week", "month", "year"]),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     if start_date > end_date:
         raise HTTPException(status_code=400, detail="Start date must be before enddate")
-    return analytics_service.get_revenue_by_period(db, start_date, end_date, group_by)
+    etag = await _cached_etag(analytics_service.get_revenue_by_period, start_date, end_date, group_by)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    return _tagged(response, await run_db(db, analytics_service.get_revenue_by_period, start_date, end_date, group_by))
 
 @router.get("/sales-by-category", response_model=CategorySalesResponse)
-def get_sales_by_category(start_date: date,end_date: date,db: Session = Depends(get_db)):
+async def get_sales_by_category(request: Request,response: Response,start_date: date,end_date: date,db: Session = Depends(get_read_db)):
     if start_date > end_date:
         raise HTTPException(status_code=400, detail="Start date must be before enddate")
-    
-    return analytics_service.get_sales_by_category(db, start_date, end_date)
+    etag = await _cached_etag(analytics_service.get_sales_by_category, start_date, end_date)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    return _tagged(response, await run_db(db, analytics_service.get_sales_by_category, start_date, end_date))
 
 @router.get("/marketplace-performance")
-def get_marketplace_performance(start_date: date,end_date: date,db: Session = Depends(get_db)):
+async def get_marketplace_performance(request: Request,response: Response,start_date: date,end_date: date,db: Session = Depends(get_read_db)):
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="Start date must be before end date")
+    etag = await _cached_etag(analytics_service.get_marketplace_performance, start_date, end_date)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    return _tagged(response, await run_db(db, analytics_service.get_marketplace_performance, start_date, end_date))
+
+@router.get("/top-products", response_model=TopProductsResponse)
+async def get_top_products(request: Request,response: Response,start_date: date,end_date: date,limit: int = Query(10, ge=1, le=100),category_id: Optional[int] = None,marketplace: Optional[str] = None,db: Session = Depends(get_read_db)):
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="Start date must be before end date")
+    etag = await _cached_etag(analytics_service.get_top_products, start_date, end_date, limit, category_id, marketplace)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    return _tagged(response, await run_db(db, analytics_service.get_top_products, start_date, end_date, limit, category_id, marketplace))
+
+@router.get("/sales-slice")
+async def get_sales_slice(start_date: date,end_date: date,by: List[str] = Query(["marketplace"], description="Any of marketplace, category, product, day, week, month, year"),db: Session = Depends(get_read_db)):
     if start_date > end_date:
         raise HTTPException(status_code=400, detail="Start date must be before end date")
-    return analytics_service.get_marketplace_performance(db, start_date, end_date)
\ No newline at end of file
+    try:
+        return await run_db(db, analytics_service.get_sales_slice, start_date, end_date, by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
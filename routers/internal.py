@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+
+import database
+from pool_metrics import pool_stats
+
+router = APIRouter(prefix="/internal", tags=["internal"])
+
+@router.get("/pool")
+async def get_pool_stats():
+    # Per-worker numbers, every uvicorn worker has its own pools
+    result = {"primary": pool_stats(database.engine)}
+    if database.read_engine is not database.engine:
+        result["replica"] = pool_stats(database.read_engine)
+    if database.DB_ASYNC:
+        result["async"] = pool_stats(database.async_engine.sync_engine)
+        if database.async_read_engine is not database.async_engine:
+            result["async_replica"] = pool_stats(database.async_read_engine.sync_engine)
+    return result
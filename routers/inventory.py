@@ -1,30 +1,123 @@
+import asyncio
+import json
+from datetime import date, datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from database import get_db
+from database import get_db, get_read_db, run_db, wants_primary, SessionLocal, ReadSessionLocal
 from schemas.inventory import (
-    Inventory, InventoryUpdate, LowStockProduct, InventoryTransaction
+    Inventory, InventoryUpdate, LowStockProduct, InventoryTransaction, StockForecast
 )
-from services import inventory_service
+from services import inventory_service, stock_forecast, pagination, export_service, inventory_events, fast_json, catalog_cache, etags, ledger_archive
 
 router = APIRouter(prefix="/api/inventory", tags=["inventory"])
 
+KEEPALIVE_SECONDS = 15
+
+async def _ledger_etag(db: Session, *parts) -> Optional[str]:
+    # Inventory data is versioned by the ledger; no tag while its latest id settles
+    version = await run_db(db, inventory_service.get_ledger_version)
+    return etags.make_etag("inventory", version, *parts) if version is not None else None
+
+def _sse(event_type: str, data: dict, event_id: Optional[int] = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
 @router.get("/", response_model=List[Inventory])
-def get_inventory_items(skip: int = 0,limit: int = 100,db: Session = Depends(get_db)):
-    return inventory_service.get_all_inventory(db, skip, limit)
+async def get_inventory_items(request: Request,skip: int = 0,limit: int = 100,db: Session = Depends(get_db)):
+    etag = await _ledger_etag(db)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    # plain rows from our own tables, sent without response_model validation
+    return fast_json.RowsResponse(await run_db(db, inventory_service.get_all_inventory, skip, limit), headers={"ETag": etag} if etag else None)
 
 @router.get("/low-stock", response_model=List[LowStockProduct])
-def get_low_stock_products(db: Session = Depends(get_db)):
-    return inventory_service.get_low_stock_products(db)
+async def get_low_stock_products(request: Request,response: Response,db: Session = Depends(get_db)):
+    # the list also depends on product names and active flags
+    etag = await _ledger_etag(db, await run_db(db, catalog_cache.current_version))
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    if etag:
+        response.headers["ETag"] = etag
+    return await run_db(db, inventory_service.get_low_stock_products)
+
+@router.get("/forecast", response_model=StockForecast)
+async def get_stock_forecast(request: Request,window_days: int = Query(stock_forecast.FORECAST_WINDOW_DAYS, ge=1, le=stock_forecast.MAX_WINDOW_DAYS),lead_time_days: int = Query(stock_forecast.FORECAST_LEAD_TIME_DAYS, ge=0),target_days: int = Query(stock_forecast.FORECAST_TARGET_DAYS, ge=0),max_days_of_cover: Optional[float] = Query(None, ge=0),db: Session = Depends(get_read_db)):
+    # velocities roll over at midnight, and product names and active flags show up too
+    etag = await _ledger_etag(db, date.today(), await run_db(db, catalog_cache.current_version), window_days, lead_time_days, target_days, max_days_of_cover)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    try:
+        forecast = await run_db(db, stock_forecast.get_stock_forecast, window_days, lead_time_days, target_days, max_days_of_cover)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # one row per active product, too many for response_model validation
+    return fast_json.RowsResponse(forecast, headers={"ETag": etag} if etag else None)
 
 @router.put("/{product_id}", response_model=Inventory)
-def update_inventory(product_id: int,inventory_update: InventoryUpdate,db: Session = Depends(get_db)):
+async def update_inventory(product_id: int,inventory_update: InventoryUpdate,db: Session = Depends(get_db)):
     try:
-        return inventory_service.update_inventory(db, product_id, inventory_update.quantity, inventory_update.low_stock_threshold, inventory_update.note)
+        return await run_db(db, inventory_service.update_inventory, product_id, inventory_update.quantity, inventory_update.low_stock_threshold, inventory_update.note)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 @router.get("/transactions", response_model=List[InventoryTransaction])
-def get_inventory_transactions(product_id: Optional[int] = None,transaction_type: Optional[str] = None,skip: int = 0,limit: int = 100,db: Session = Depends(get_db)):
-    return inventory_service.get_inventory_transactions(db, product_id, transaction_type, skip, limit)
\ No newline at end of file
+async def get_inventory_transactions(request: Request,product_id: Optional[int] = None,transaction_type: Optional[str] = None,start_date: Optional[datetime] = None,end_date: Optional[datetime] = None,skip: int = 0,limit: int = 100,cursor: Optional[str] = None,db: Session = Depends(get_read_db)):
+    # archiving moves rows out of the default (table only) view
+    etag = await _ledger_etag(db, ledger_archive.archive_boundary())
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    try:
+        transactions = await run_db(db, inventory_service.get_inventory_transactions, product_id, transaction_type, skip, limit, cursor, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"ETag": etag} if etag else {}
+    next_cursor = pagination.next_cursor(transactions, limit, "created_at")
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return fast_json.RowsResponse(transactions, headers=headers)
+
+@router.get("/transactions/export")
+async def export_inventory_transactions(request: Request,format: str = Query("csv", enum=["csv", "ndjson"]),product_id: Optional[int] = None,transaction_type: Optional[str] = None):
+    session_factory = SessionLocal if wants_primary(request) else ReadSessionLocal
+    rows = export_service.iter_with_session(session_factory, inventory_service.export_inventory_transactions, product_id, transaction_type)
+    if format == "ndjson":
+        return StreamingResponse(export_service.encode_ndjson(rows), media_type="application/x-ndjson", headers={"Content-Disposition": "attachment; filename=inventory_transactions.ndjson"})
+    return StreamingResponse(export_service.encode_csv(rows, inventory_service.TRANSACTION_EXPORT_COLUMNS), media_type="text/csv", headers={"Content-Disposition": "attachment; filename=inventory_transactions.csv"})
+
+@router.get("/stream")
+async def stream_inventory_events(request: Request, last_event_id: Optional[int] = None):
+    # Server-Sent Events: stock_changed, low_stock and stock_recovered. Browsers
+    # resend the last id in the Last-Event-ID header when they reconnect.
+    header = request.headers.get("last-event-id")
+    if header is not None and header.isdigit():
+        last_event_id = int(header)
+    subscription, replay, reset = inventory_events.broker.subscribe(last_event_id)
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            if reset:
+                # missed events are gone: the client should reload /low-stock
+                yield _sse("reset", {"reason": "history unavailable"})
+            for event in replay:
+                yield _sse(event["type"], event, event["id"])
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                if event is inventory_events.OVERFLOW:
+                    # too slow to keep up: end the stream, the client resumes
+                    # from its last id on reconnect
+                    break
+                yield _sse(event["type"], event, event["id"])
+        finally:
+            inventory_events.broker.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from database import get_db, run_db
+from schemas.jobs import Job, JobCreate
+from services import job_queue
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+# Job state is written by the job threads on the primary, so every route reads it there
+
+@router.post("/", response_model=Job, status_code=202)
+async def submit_job(job: JobCreate, db: Session = Depends(get_db)):
+    try:
+        return await run_db(db, job_queue.submit_job, job.kind, job.params)
+    except job_queue.JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{job_id}", response_model=Job)
+async def get_job(job_id: str, db: Session = Depends(get_db)):
+    job = await run_db(db, job_queue.get_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str, db: Session = Depends(get_db)):
+    try:
+        result = await run_db(db, job_queue.get_job_result, job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not result:
+        raise HTTPException(status_code=404, detail="Job not found")
+    path, media_type, filename = result
+    return FileResponse(path, media_type=media_type, filename=filename)
+
+@router.delete("/{job_id}", response_model=Job)
+async def cancel_job(job_id: str, db: Session = Depends(get_db)):
+    try:
+        job = await run_db(db, job_queue.cancel_job, job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
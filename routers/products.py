@@ -1,48 +1,74 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
-from database import get_db
-from schemas.product import Product, ProductCreate, ProductUpdate, Category, CategoryCreate
-from services import product_service
+from database import get_db, get_read_db, run_db
+from schemas.product import Product, ProductCreate, ProductUpdate, Category, CategoryCreate, ProductSearchResult, ProductSuggestion
+from services import catalog_cache, etags, product_search, product_service
 
 router = APIRouter(prefix="/api/products", tags=["products"])
 
+async def _catalog_etag(db: Session) -> str:
+    # Every catalog write bumps the catalog version, so the version the serving
+    # session reads tags every catalog read
+    return etags.make_etag("catalog", await run_db(db, catalog_cache.current_version))
+
 # Product endpoints
 @router.get("/", response_model=List[Product])
-def get_products(skip: int = 0, limit: int = 100, category_id: Optional[int] = None, db: Session = Depends(get_db)):
-    return product_service.get_products(db, skip, limit, category_id)
+async def get_products(request: Request, response: Response, skip: int = 0, limit: int = 100, category_id: Optional[int] = None, db: Session = Depends(get_read_db)):
+    etag = await _catalog_etag(db)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    response.headers["ETag"] = etag
+    return await run_db(db, product_service.get_products, skip, limit, category_id)
+
+# Declared before /{product_id} so "search" isn't read as an id
+@router.get("/search", response_model=List[ProductSearchResult])
+async def search_products(q: str = Query(..., min_length=1), limit: int = Query(20, ge=1, le=100), db: Session = Depends(get_db)):
+    return await run_db(db, product_search.search_products, q, limit)
+
+@router.get("/autocomplete", response_model=List[ProductSuggestion])
+async def autocomplete_products(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50), db: Session = Depends(get_db)):
+    return await run_db(db, product_search.autocomplete_products, q, limit)
 
 @router.get("/{product_id}", response_model=Product)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    product = product_service.get_product(db, product_id)
+async def get_product(request: Request, response: Response, product_id: int, db: Session = Depends(get_db)):
+    etag = await _catalog_etag(db)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    product = await run_db(db, product_service.get_product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
+    response.headers["ETag"] = etag
     return product
 
 @router.post("/", response_model=Product)
-def create_product(product: ProductCreate, db: Session = Depends(get_db)):
-    return product_service.create_product(db, product)
+async def create_product(product: ProductCreate, db: Session = Depends(get_db)):
+    return await run_db(db, product_service.create_product, product)
 
 @router.put("/{product_id}", response_model=Product)
-def update_product(product_id: int, product_update: ProductUpdate, db: Session = Depends(get_db)):
-    product = product_service.update_product(db, product_id, product_update)
+async def update_product(product_id: int, product_update: ProductUpdate, db: Session = Depends(get_db)):
+    product = await run_db(db, product_service.update_product, product_id, product_update)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     return product
 
 @router.delete("/{product_id}", response_model=dict)
-def delete_product(product_id: int, db: Session = Depends(get_db)):
-    success = product_service.delete_product(db, product_id)
+async def delete_product(product_id: int, db: Session = Depends(get_db)):
+    success = await run_db(db, product_service.delete_product, product_id)
     if not success:
         raise HTTPException(status_code=404, detail="Product not found")
     return {"success": True, "message": "Product deleted successfully"}
 
 # Category routes
 @router.get("/categories/", response_model=List[Category])
-def get_categories(db: Session = Depends(get_db)):
-    return product_service.get_categories(db)
+async def get_categories(request: Request, response: Response, db: Session = Depends(get_db)):
+    etag = await _catalog_etag(db)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    response.headers["ETag"] = etag
+    return await run_db(db, product_service.get_categories)
 
 @router.post("/categories/", response_model=Category)
-def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
-    return product_service.create_category(db, category)
\ No newline at end of file
+async def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
+    return await run_db(db, product_service.create_category, category)
\ No newline at end of file
@@ -1,32 +1,58 @@
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from database import get_db
-from schemas.sales import Order, OrderCreate
-from services import sales_service
+from database import get_db, get_read_db, run_db, wants_primary, SessionLocal, ReadSessionLocal
+from schemas.sales import Order, OrderCreate, OrderBulkCreate, OrderBulkResponse
+from services import sales_service, pagination, export_service, fast_json
 
 router = APIRouter(prefix="/api/sales", tags=["sales"])
 
 @router.get("/orders", response_model=List[Order])
-def get_orders(marketplace: Optional[str] = None, status: Optional[str] = None, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return sales_service.get_orders(db, marketplace, status, start_date, end_date, skip, limit)
+async def get_orders(marketplace: Optional[str] = None, status: Optional[str] = None, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_read_db)):
+    try:
+        orders = await run_db(db, sales_service.get_orders, marketplace, status, start_date, end_date, skip, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    next_cursor = pagination.next_cursor(orders, limit, "order_date")
+    # plain rows from our own tables, sent without response_model validation
+    return fast_json.RowsResponse(orders, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+# declared before /orders/{order_id} so "export" isn't taken for an order id
+@router.get("/orders/export")
+async def export_orders(request: Request, format: str = Query("csv", enum=["csv", "ndjson"]), marketplace: Optional[str] = None, status: Optional[str] = None, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None):
+    session_factory = SessionLocal if wants_primary(request) else ReadSessionLocal
+    rows = export_service.iter_with_session(session_factory, sales_service.export_orders, marketplace, status, start_date, end_date, nested=format == "ndjson")
+    if format == "ndjson":
+        return StreamingResponse(export_service.encode_ndjson(rows), media_type="application/x-ndjson", headers={"Content-Disposition": "attachment; filename=orders.ndjson"})
+    return StreamingResponse(export_service.encode_csv(rows, sales_service.ORDER_EXPORT_COLUMNS), media_type="text/csv", headers={"Content-Disposition": "attachment; filename=orders.csv"})
 
 @router.get("/orders/{order_id}", response_model=Order)
-def get_order(order_id: int, db: Session = Depends(get_db)):
-    order = sales_service.get_order(db, order_id)
+async def get_order(order_id: int, db: Session = Depends(get_db)):
+    order = await run_db(db, sales_service.get_order, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return order
 
 @router.post("/orders", response_model=Order)
-def create_order(order: OrderCreate, db: Session = Depends(get_db)):
-    return sales_service.create_order(db, order)
+async def create_order(order: OrderCreate, db: Session = Depends(get_db)):
+    try:
+        return await run_db(db, sales_service.create_order, order)
+    except sales_service.InsufficientStockError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.post("/orders/bulk", response_model=OrderBulkResponse)
+async def create_orders_bulk(payload: OrderBulkCreate, db: Session = Depends(get_db)):
+    return await run_db(db, sales_service.create_orders_bulk, payload.orders)
 
 @router.put("/orders/{order_id}/status", response_model=Order)
-def update_order_status(order_id: int, status: str = Query(..., description="New order status"), db: Session = Depends(get_db)):
-    order = sales_service.update_order_status(db, order_id, status)
+async def update_order_status(order_id: int, status: str = Query(..., description="New order status"), db: Session = Depends(get_db)):
+    try:
+        order = await run_db(db, sales_service.update_order_status, order_id, status)
+    except sales_service.InsufficientStockError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return order
\ No newline at end of file
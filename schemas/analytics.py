@@ -29,4 +29,9 @@ class ProductSales(BaseModel):
     sku: str
     name: str
     total_sales: float
-    units_sold: int
\ No newline at end of file
+    units_sold: int
+
+class TopProductsResponse(BaseModel):
+    start_date: date
+    end_date: date
+    data: List[ProductSales]
@@ -1,5 +1,5 @@
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 from pydantic import BaseModel, Field
 
 class InventoryBase(BaseModel):
@@ -44,4 +44,23 @@ class InventoryTransaction(InventoryTransactionBase):
     created_at: datetime
   
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class StockForecastItem(BaseModel):
+    product_id: int
+    sku: str
+    name: str
+    quantity: int
+    velocity: float
+    velocity_short: float
+    velocity_long: float
+    days_of_cover: Optional[float] = None
+    reorder_point: int
+    reorder_quantity: int
+
+class StockForecast(BaseModel):
+    as_of: date
+    window_days: int
+    lead_time_days: int
+    target_days: int
+    data: List[StockForecastItem]
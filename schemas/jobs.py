@@ -0,0 +1,49 @@
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime
+from pydantic import BaseModel, Field
+
+# Parameters of each job kind, the same as the query parameters of the
+# endpoint the job stands in for
+
+class DateRangeJobParams(BaseModel):
+    start_date: date
+    end_date: date
+
+class RevenueJobParams(DateRangeJobParams):
+    group_by: str = Field("day", regex="^(day|week|month|year)$")
+
+class TopProductsJobParams(DateRangeJobParams):
+    limit: int = Field(10, ge=1, le=100)
+    category_id: Optional[int] = None
+    marketplace: Optional[str] = None
+
+class SalesSliceJobParams(DateRangeJobParams):
+    by: List[str] = ["marketplace"]
+
+class OrderExportJobParams(BaseModel):
+    format: str = Field("csv", regex="^(csv|ndjson)$")
+    marketplace: Optional[str] = None
+    status: Optional[str] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+
+class TransactionExportJobParams(BaseModel):
+    format: str = Field("csv", regex="^(csv|ndjson)$")
+    product_id: Optional[int] = None
+    transaction_type: Optional[str] = None
+
+class JobCreate(BaseModel):
+    kind: str
+    params: Dict[str, Any] = {}
+
+class Job(BaseModel):
+    id: str
+    kind: str
+    params: Dict[str, Any]
+    status: str
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: datetime
+    result_url: Optional[str] = None
@@ -51,4 +51,12 @@ class ProductWithInventory(Product):
     low_stock_threshold: int
     
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class ProductSearchResult(Product):
+    score: float
+
+class ProductSuggestion(BaseModel):
+    id: int
+    sku: str
+    name: str
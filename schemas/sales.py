@@ -39,4 +39,18 @@ class Order(OrderBase):
     created_at: datetime
     updated_at: datetime
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+class OrderBulkCreate(BaseModel):
+    orders: List[OrderCreate] = Field(..., min_items=1, max_items=5000)
+
+class OrderBulkResult(BaseModel):
+    index: int
+    success: bool
+    order_id: Optional[int] = None
+    order_number: Optional[str] = None
+    error: Optional[str] = None
+
+class OrderBulkResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[OrderBulkResult]
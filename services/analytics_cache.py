@@ -0,0 +1,195 @@
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import database
+
+# Cache for analytics_service results keyed by (function, start_date, end_date,
+# remaining arguments).
+# Writes only invalidate entries whose date range covers the order's date, so
+# dashboards over closed ranges keep hitting the cache while orders come in.
+# Every invalidation also moves a generation counter, and a result is only
+# stored if the generation hasn't moved since its query started: a read that
+# overlapped a write may have missed it.
+
+ANALYTICS_CACHE_BACKEND = os.getenv("ANALYTICS_CACHE_BACKEND", "memory")  # memory, redis or off
+ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", "300"))
+ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "1024"))
+# Seconds a result read from the replica lives. A lagging replica can serve
+# data from before an invalidation, so this bounds how stale it can get; 0
+# leaves replica reads uncached.
+ANALYTICS_CACHE_REPLICA_TTL = int(os.getenv("ANALYTICS_CACHE_REPLICA_TTL", "0"))
+ANALYTICS_CACHE_REDIS_URL = os.getenv("ANALYTICS_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+CacheKey = Tuple[str, date, date, Optional[str]]
+
+class InMemoryBackend:
+    # Per-process LRU with TTL. Other workers only see invalidations through the TTL.
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def set(self, key: CacheKey, value: Any, generation: int, ttl: int) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_dates(self, days: Iterable[date]) -> None:
+        days = set(days)
+        with self._lock:
+            self._generation += 1
+            stale = [key for key in self._entries if any(key[1] <= day <= key[2] for day in days)]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+class RedisBackend:
+    # Shared across workers. Values are stored as JSON with a TTL, and a hash
+    # maps every key to its date range and expiry so invalidation can find the
+    # keys that cover a date. Expired keys are trimmed from the hash on
+    # invalidation, and the hash itself expires once nothing has been stored
+    # for a TTL. Eviction beyond the TTL is left to redis' maxmemory-policy.
+    PREFIX = "analytics-cache:"
+    RANGES = "analytics-cache:ranges"
+    GENERATION = "analytics-cache:generation"
+
+    def __init__(self, url: str, ttl: int):
+        import redis  # optional dependency, only needed for this backend
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self._watch_error = redis.WatchError
+
+    def _name(self, key: CacheKey) -> str:
+        function, start_date, end_date, variant = key
+        return f"{self.PREFIX}{function}:{start_date.isoformat()}:{end_date.isoformat()}:{variant or ''}"
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        raw = self.client.get(self._name(key))
+        return json.loads(raw) if raw is not None else None
+
+    def generation(self) -> int:
+        return int(self.client.get(self.GENERATION) or 0)
+
+    def set(self, key: CacheKey, value: Any, generation: int, ttl: int) -> None:
+        name = self._name(key)
+        with self.client.pipeline() as pipe:
+            try:
+                # the transaction is dropped if an invalidation bumps the generation meanwhile
+                pipe.watch(self.GENERATION)
+                if int(pipe.get(self.GENERATION) or 0) != generation:
+                    return
+                pipe.multi()
+                pipe.setex(name, ttl, json.dumps(value))
+                pipe.hset(self.RANGES, name, f"{key[1].isoformat()}|{key[2].isoformat()}|{time.time() + ttl:.0f}")
+                pipe.expire(self.RANGES, max(ttl, self.ttl))
+                pipe.execute()
+            except self._watch_error:
+                pass
+
+    def invalidate_dates(self, days: Iterable[date]) -> None:
+        days = [day.isoformat() for day in set(days)]
+        self.client.incr(self.GENERATION)
+        now = time.time()
+        stale = []
+        for name, span in self.client.hgetall(self.RANGES).items():
+            start, end, expires_at = span.decode().split("|")
+            if float(expires_at) < now or any(start <= day <= end for day in days):
+                stale.append(name)
+        if stale:
+            pipe = self.client.pipeline()
+            pipe.delete(*stale)
+            pipe.hdel(self.RANGES, *stale)
+            pipe.execute()
+
+    def clear(self) -> None:
+        self.client.incr(self.GENERATION)
+        names = list(self.client.hkeys(self.RANGES))
+        if names:
+            self.client.delete(*names)
+        self.client.delete(self.RANGES)
+
+def _create_backend():
+    if ANALYTICS_CACHE_BACKEND == "off":
+        return None
+    if ANALYTICS_CACHE_BACKEND == "redis":
+        return RedisBackend(ANALYTICS_CACHE_REDIS_URL, ANALYTICS_CACHE_TTL)
+    return InMemoryBackend(ANALYTICS_CACHE_SIZE, ANALYTICS_CACHE_TTL)
+
+backend = _create_backend()
+
+def _key(fn, start_date: date, end_date: date, args: Tuple) -> CacheKey:
+    # Further positional arguments (group_by, filters, ...) make up the variant
+    variant = ":".join("" if arg is None else str(arg) for arg in args) if args else None
+    return (fn.__name__, start_date, end_date, variant)
+
+def cached(fn):
+    # Wrap an analytics_service function taking (db, start_date, end_date, *args).
+    # Callers pass every argument positionally so equal calls share a key.
+    @functools.wraps(fn)
+    def wrapper(db, start_date: date, end_date: date, *args) -> Dict[str, Any]:
+        if backend is None:
+            return fn(db, start_date, end_date, *args)
+        key = _key(fn, start_date, end_date, args)
+        entry = backend.get(key)
+        if entry is None:
+            generation = backend.generation()
+            result = fn(db, start_date, end_date, *args)
+            entry = {"result": result, "hash": result_hash(result)}
+            ttl = ANALYTICS_CACHE_REPLICA_TTL if database.reads_replica(db) else backend.ttl
+            if ttl > 0:
+                backend.set(key, entry, generation, ttl)
+        return entry["result"]
+    return wrapper
+
+def result_hash(result: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(result, sort_keys=True, default=str).encode()).hexdigest()
+
+def cached_hash(fn, start_date: date, end_date: date, *args) -> Optional[str]:
+    # result_hash of the cached result for these arguments, None when there is
+    # none. Lets a conditional GET be answered without running the query.
+    if backend is None:
+        return None
+    entry = backend.get(_key(fn, start_date, end_date, args))
+    return entry["hash"] if entry is not None else None
+
+def invalidate_dates(days: Iterable[date]) -> None:
+    # Call after committing orders dated on these days
+    if backend is not None:
+        backend.invalidate_dates(days)
+
+def clear() -> None:
+    if backend is not None:
+        backend.clear()
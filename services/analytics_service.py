@@ -1,54 +1,60 @@
-from typing import List, Dict, Any
-from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional
+from datetime import date, datetime, time, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, extract
+from sqlalchemy import func, and_, extract, or_, select, union_all
 from sqlalchemy.sql import label
 
-from models.sales import Order, OrderItem
+from models.sales import Order, OrderItem, DailySalesRollup, DailyProductSalesRollup, MonthlyProductSalesRollup
 from models.product import Product, Category
+from services import analytics_cache, columnar_analytics
 
-def get_revenue_by_period(db: Session, start_date: date, end_date: date, group_by: str = "day") -> Dict[str, Any]:
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(end_date, datetime.max.time())
-    query_totals = db.query(
-        func.sum(Order.total).label("total_revenue"),
-        func.count(Order.id).label("order_count")
-    ).filter(
-        Order.order_date.between(start_datetime, end_datetime)
-    ).first()
-    
-    total_revenue = query_totals.total_revenue or 0
-    order_count = query_totals.order_count or 0
-    avg_order_value = total_revenue / order_count if order_count > 0 else 0
-    
+def _period_key(day: date, group_by: str) -> str:
+    # Same labels the old date()/date_format()/extract() SQL produced
     if group_by == "day":
-        # For simplicity, use date part of order_date
-        date_format = func.date(Order.order_date)
+        return day.isoformat()
     elif group_by == "week":
-        date_format = func.date_format(Order.order_date, '%Y-%u')
+        # MySQL '%u': Monday-first weeks, week 1 is the first with 4+ days in the year
+        week_one = date.fromisocalendar(day.year, 1, 1)
+        week = (day - week_one).days // 7 + 1 if day >= week_one else 0
+        return f"{day.year}-{week:02d}"
     elif group_by == "month":
-        date_format = func.date_format(Order.order_date, '%Y-%m')
+        return day.strftime("%Y-%m")
     elif group_by == "year":
-        date_format = func.extract('year', Order.order_date)
-    else:
+        return str(day.year)
+    raise ValueError(f"Invalid groupby parameter: {group_by}")
+
+@analytics_cache.cached
+def get_revenue_by_period(db: Session, start_date: date, end_date: date, group_by: str = "day") -> Dict[str, Any]:
+    if group_by not in ("day", "week", "month", "year"):
         raise ValueError(f"Invalid groupby parameter: {group_by}")
+    if columnar_analytics.enabled():
+        return columnar_analytics.get_snapshot(db).revenue_by_period(start_date, end_date, group_by)
     
-    query_by_period = db.query(
-        date_format.label("period"),
-        func.sum(Order.total).label("revenue"),
-        func.count(Order.id).label("order_count")
+    # read the per-day rollup (one row per day after summing marketplaces) and bucket in python
+    daily_rows = db.query(
+        DailySalesRollup.day,
+        func.sum(DailySalesRollup.revenue).label("revenue"),
+        func.sum(DailySalesRollup.order_count).label("order_count")
     ).filter(
-        Order.order_date.between(start_datetime, end_datetime)
-    ).group_by("period").order_by("period").all()
+        DailySalesRollup.day.between(start_date, end_date)
+    ).group_by(DailySalesRollup.day).order_by(DailySalesRollup.day).all()
+    
+    periods: Dict[str, List[float]] = {}
+    for row in daily_rows:
+        bucket = periods.setdefault(_period_key(row.day, group_by), [0.0, 0])
+        bucket[0] += float(row.revenue or 0)
+        bucket[1] += int(row.order_count or 0)
+    
+    total_revenue = sum(bucket[0] for bucket in periods.values())
+    order_count = sum(bucket[1] for bucket in periods.values())
+    avg_order_value = total_revenue / order_count if order_count > 0 else 0
     
     data_points = []
-    for point in query_by_period:
-        period_revenue = point.revenue or 0
-        period_orders = point.order_count or 0
+    for period, (period_revenue, period_orders) in periods.items():
         period_avg = period_revenue / period_orders if period_orders > 0 else 0
         
         data_points.append({
-            "period": str(point.period),
+            "period": period,
             "revenue": float(period_revenue),
             "order_count": period_orders,
             "average_order_value": float(period_avg)
@@ -60,25 +66,25 @@ def get_revenue_by_period(db: Session, start_date: date, end_date: date, group_b
         "data_points": data_points
              }
 
+@analytics_cache.cached
 def get_sales_by_category(db: Session, start_date: date, end_date: date) -> Dict[str, Any]:
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(end_date, datetime.max.time())
+    if columnar_analytics.enabled():
+        return columnar_analytics.get_snapshot(db).sales_by_category(start_date, end_date, columnar_analytics.category_names(db))
     
     # this query is for the category sales e.g. by name by category id...
+    # order_count is the number of order lines, same as the old count(distinct OrderItem.id)
     category_sales = db.query(
         Category.id.label("category_id"),
         Category.name.label("category_name"),
-        func.sum(OrderItem.subtotal).label("total_sales"),
-        func.count(OrderItem.id.distinct()).label("order_count"),
-        func.count(OrderItem.product_id.distinct()).label("product_count")
+        func.sum(DailyProductSalesRollup.total_sales).label("total_sales"),
+        func.sum(DailyProductSalesRollup.line_count).label("order_count"),
+        func.count(DailyProductSalesRollup.product_id.distinct()).label("product_count")
     ).join(
-        Product, Product.id == OrderItem.product_id
+        Product, Product.id == DailyProductSalesRollup.product_id
     ).join(
         Category, Category.id == Product.category_id
-    ).join(
-        Order, Order.id == OrderItem.order_id
     ).filter(
-        Order.order_date.between(start_datetime, end_datetime)
+        DailyProductSalesRollup.day.between(start_date, end_date)
     ).group_by(
         Category.id, Category.name
     ).all()
@@ -94,18 +100,19 @@ def get_sales_by_category(db: Session, start_date: date, end_date: date) -> Dict
             "category_id": item.category_id,
             "category_name": item.category_name,
             "total_sales": float(item.total_sales or 0),
-            "order_count": item.order_count,
+            "order_count": int(item.order_count or 0),
             "product_count": item.product_count
         })
     
     return result
 
+@analytics_cache.cached
 def get_marketplace_performance(db: Session, start_date: date, end_date: date) -> Dict[str, Any]:
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(end_date, datetime.max.time())
+    if columnar_analytics.enabled():
+        return columnar_analytics.get_snapshot(db).marketplace_performance(start_date, end_date)
     
-    marketplace_data = db.query(Order.marketplace,func.sum(Order.total).label("total_sales"),func.count(Order.id).label("order_count"),func.avg(Order.total).label("average_order_value")
-    ).filter(Order.order_date.between(start_datetime, end_datetime)).group_by(Order.marketplace).all()
+    marketplace_data = db.query(DailySalesRollup.marketplace,func.sum(DailySalesRollup.revenue).label("total_sales"),func.sum(DailySalesRollup.order_count).label("order_count")
+    ).filter(DailySalesRollup.day.between(start_date, end_date)).group_by(DailySalesRollup.marketplace).all()
     
     result = {
         "start_date": start_date.isoformat(),
@@ -114,11 +121,96 @@ def get_marketplace_performance(db: Session, start_date: date, end_date: date) -
     }
     
     for item in marketplace_data:
+        total_sales = float(item.total_sales or 0)
+        order_count = int(item.order_count or 0)
         result["marketplaces"].append({
             "name": item.marketplace,
-            "total_sales": float(item.total_sales or 0),
-            "order_count": item.order_count,
-            "average_order_value": float(item.average_order_value or 0)
+            "total_sales": total_sales,
+            "order_count": order_count,
+            "average_order_value": total_sales / order_count if order_count > 0 else 0.0
         })
     
-    return result
\ No newline at end of file
+    return result
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def _rollup_product_lines(start_date: date, end_date: date):
+    # (product_id, total_sales, units_sold) rows covering the range: whole
+    # calendar months from the monthly rollup, the partial months at either end
+    # from the daily one. A range of years reads about as many rows as two months.
+    first_full = start_date if start_date.day == 1 else _next_month(start_date)
+    full_end = (end_date + timedelta(days=1)).replace(day=1)
+    daily = select(DailyProductSalesRollup.product_id, DailyProductSalesRollup.total_sales, DailyProductSalesRollup.units_sold)
+    if first_full >= full_end:
+        return daily.where(DailyProductSalesRollup.day.between(start_date, end_date))
+    monthly = select(MonthlyProductSalesRollup.product_id, MonthlyProductSalesRollup.total_sales, MonthlyProductSalesRollup.units_sold).where(
+        MonthlyProductSalesRollup.month >= first_full, MonthlyProductSalesRollup.month < full_end
+    )
+    daily = daily.where(or_(
+        DailyProductSalesRollup.day.between(start_date, first_full - timedelta(days=1)),
+        DailyProductSalesRollup.day.between(full_end, end_date)
+    ))
+    return union_all(monthly, daily)
+
+@analytics_cache.cached
+def get_top_products(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    limit: int = 10,
+    category_id: Optional[int] = None,
+    marketplace: Optional[str] = None
+) -> Dict[str, Any]:
+    # Best sellers by revenue, counting orders of every status like the other
+    # reports. The product rollups have no marketplace, so with that filter the
+    # lines are summed from order_items instead, through
+    # ix_orders_marketplace_order_date_id and the covering order_items index.
+    if marketplace:
+        lines = select(OrderItem.product_id, OrderItem.subtotal.label("total_sales"), OrderItem.quantity.label("units_sold")).join(
+            Order, Order.id == OrderItem.order_id
+        ).where(
+            Order.marketplace == marketplace,
+            Order.order_date >= datetime.combine(start_date, time.min),
+            Order.order_date < datetime.combine(end_date + timedelta(days=1), time.min)
+        )
+    else:
+        lines = _rollup_product_lines(start_date, end_date)
+    lines = lines.subquery()
+
+    # Sum per product first, then join the sums to products for names and the category filter
+    totals = select(
+        lines.c.product_id,
+        func.sum(lines.c.total_sales).label("total_sales"),
+        func.sum(lines.c.units_sold).label("units_sold")
+    ).group_by(lines.c.product_id).subquery()
+    stmt = select(Product.id, Product.sku, Product.name, totals.c.total_sales, totals.c.units_sold).join(
+        totals, totals.c.product_id == Product.id
+    )
+    if category_id:
+        stmt = stmt.where(Product.category_id == category_id)
+    stmt = stmt.order_by(totals.c.total_sales.desc(), Product.id).limit(limit)
+
+    return {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "data": [
+            {
+                "product_id": row.id,
+                "sku": row.sku,
+                "name": row.name,
+                "total_sales": float(row.total_sales or 0),
+                "units_sold": int(row.units_sold or 0)
+            }
+            for row in db.execute(stmt)
+        ]
+    }
+
+def get_sales_slice(db: Session, start_date: date, end_date: date, by: List[str]) -> Dict[str, Any]:
+    # ad hoc slicing always runs on the columnar snapshot, there is no rollup for arbitrary dimensions
+    return {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "dimensions": by,
+        "data": columnar_analytics.get_snapshot(db).slice_sales(start_date, end_date, by)
+    }
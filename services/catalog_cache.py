@@ -0,0 +1,137 @@
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+import database
+from models.product import CatalogVersion
+
+# Read-through cache for product_service reads, per worker. Every catalog
+# write bumps the single catalog_version row in its own transaction; each
+# worker polls that row in a background thread and drops its entries when the
+# version moves, so hot reads are served without touching the database and
+# other workers catch up within CATALOG_VERSION_POLL_SECONDS.
+
+CATALOG_CACHE = os.getenv("CATALOG_CACHE", "true").lower() in ("1", "true", "yes")
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "4096"))
+CATALOG_VERSION_POLL_SECONDS = float(os.getenv("CATALOG_VERSION_POLL_SECONDS", "2"))
+
+class CatalogCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.version: Optional[int] = None
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._poller: Optional[threading.Thread] = None
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        with self._lock:
+            if key not in self._entries:
+                return False, None
+            self._entries.move_to_end(key)
+            return True, self._entries[key]
+
+    def set(self, key: Tuple, value: Any, version: Optional[int]) -> None:
+        # Only keep a value read under the current version: if the version
+        # moved while it was being read it may already be stale
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def observe(self, version: int) -> None:
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                self._entries.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def start_polling(self) -> None:
+        if self._poller is None:
+            with self._lock:
+                if self._poller is None:
+                    self._poller = threading.Thread(target=self._poll, name="catalog-version-poller", daemon=True)
+                    self._poller.start()
+
+    def _poll(self) -> None:
+        while True:
+            try:
+                db = database.SessionLocal()
+                try:
+                    self.observe(db.scalar(select(CatalogVersion.version).where(CatalogVersion.id == 1)) or 0)
+                finally:
+                    db.close()
+            except Exception as e:
+                # keep serving what we have and try again on the next tick
+                print(f"Catalog version poll failed: {e}")
+            time.sleep(CATALOG_VERSION_POLL_SECONDS)
+
+cache = CatalogCache(CATALOG_CACHE_SIZE)
+
+def _detach(db: Session, value: Any) -> None:
+    # Cached rows outlive the session that loaded them and are shared between
+    # requests, so take them out of it with their attributes loaded
+    for instance in value if isinstance(value, list) else [value]:
+        if instance is not None and instance in db:
+            db.expunge(instance)
+
+def _session_version(db: Session) -> int:
+    return db.scalar(select(CatalogVersion.version).where(CatalogVersion.id == 1)) or 0
+
+def cached(fn):
+    # Wrap a product_service read taking (db, ...)
+    @functools.wraps(fn)
+    def wrapper(db: Session, *args, **kwargs):
+        if not CATALOG_CACHE:
+            return fn(db, *args, **kwargs)
+        cache.start_polling()
+        key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+        hit, value = cache.get(key)
+        if hit:
+            return value
+        version = cache.version
+        if database.reads_replica(db):
+            # A lagging replica may not have caught up with the version this
+            # worker polled from the primary: store under what the session
+            # itself sees, read first so the rows are at least that new
+            version = _session_version(db)
+        value = fn(db, *args, **kwargs)
+        _detach(db, value)
+        cache.set(key, value, version)
+        return value
+    return wrapper
+
+def bump_version(db: Session) -> int:
+    # Call inside the writing transaction, before commit. Returns the new
+    # version, to pass to invalidate() once the commit went through.
+    db.execute(update(CatalogVersion).where(CatalogVersion.id == 1).values(version=CatalogVersion.version + 1))
+    version = db.scalar(select(CatalogVersion.version).where(CatalogVersion.id == 1))
+    if version is None:
+        db.add(CatalogVersion(id=1, version=1))
+        version = 1
+    return version
+
+def current_version(db: Session) -> int:
+    # The version cached reads correspond to, for ETags. Read from the database
+    # (one primary-key lookup) when the cache is off or hasn't polled yet, and
+    # from a replica session itself, which may not have reached the polled one.
+    if CATALOG_CACHE and not database.reads_replica(db):
+        cache.start_polling()
+        if cache.version is not None:
+            return cache.version
+    return _session_version(db)
+
+def invalidate(version: int) -> None:
+    # This worker drops its entries right away; the others on their next poll
+    cache.observe(version)
@@ -0,0 +1,318 @@
+import os
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models.sales import Order, OrderItem
+from models.product import Product, Category
+
+# In-process columnar snapshot of orders and order lines for vectorized
+# group-bys. Orders are append-only for analytics purposes (revenue counts
+# every status and totals never change), so the snapshot only ever grows:
+# before answering, it pulls orders with an id above the highest one it holds.
+# A line's category is captured when it's loaded, so recategorizing a product
+# only shows up here after a restart.
+
+# "columnar" makes the revenue / category / marketplace endpoints answer from
+# the snapshot, the default "sql" keeps them on the rollup tables.
+ANALYTICS_ENGINE = os.getenv("ANALYTICS_ENGINE", "sql")
+
+# Ids below the high-water mark that weren't visible yet (transactions that
+# committed out of order) are rechecked for this long before giving up on them.
+GAP_RETRY_SECONDS = 300
+LOAD_BATCH = 100_000
+EPOCH = np.datetime64("1970-01-01", "D")
+
+SLICE_DIMENSIONS = ("marketplace", "category", "product", "day", "week", "month", "year")
+
+def enabled() -> bool:
+    return ANALYTICS_ENGINE == "columnar"
+
+class _Column:
+    # Append-only numpy array with amortized doubling
+    def __init__(self, dtype):
+        self.data = np.empty(1024, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values) -> None:
+        values = np.asarray(values, dtype=self.data.dtype)
+        needed = self.size + len(values)
+        if needed > len(self.data):
+            grown = np.empty(max(needed, len(self.data) * 2), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:needed] = values
+        self.size = needed
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.data[:self.size]
+
+    @property
+    def nbytes(self) -> int:
+        return self.size * self.data.itemsize
+
+def _to_days(dates) -> np.ndarray:
+    return (np.array(dates, dtype="datetime64[D]") - EPOCH).astype(np.int32)
+
+def _period_codes(days: np.ndarray, group_by: str):
+    # Returns (integer code per row, function turning a code into its label),
+    # matching analytics_service._period_key
+    as_dates = EPOCH + days.astype("timedelta64[D]")
+    if group_by == "day":
+        return days, lambda code: str(EPOCH + np.timedelta64(int(code), "D"))
+    if group_by == "month":
+        months = as_dates.astype("datetime64[M]").astype(np.int64)
+        return months, lambda code: str(np.datetime64(int(code), "M"))
+    if group_by == "year":
+        years = as_dates.astype("datetime64[Y]").astype(np.int64)
+        return years, lambda code: str(1970 + int(code))
+    if group_by == "week":
+        # MySQL '%u': Monday-first weeks, week 1 is the first with 4+ days in the year
+        years = as_dates.astype("datetime64[Y]")
+        jan4 = (years.astype("datetime64[D]") - EPOCH).astype(np.int64) + 3
+        week_one = jan4 - (jan4 - 4) % 7  # 1970-01-01 was a Thursday
+        days64 = days.astype(np.int64)
+        weeks = np.where(days64 >= week_one, (days64 - week_one) // 7 + 1, 0)
+        codes = (years.astype(np.int64) + 1970) * 100 + weeks
+        return codes, lambda code: f"{int(code) // 100}-{int(code) % 100:02d}"
+    raise ValueError(f"Invalid groupby parameter: {group_by}")
+
+class OrderSnapshot:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.max_order_id = 0
+        self._gaps: Dict[int, float] = {}
+        self.marketplaces: List[str] = []
+        self._marketplace_codes: Dict[str, int] = {}
+        # one row per order
+        self.order_day = _Column(np.int32)
+        self.order_total = _Column(np.float64)
+        self.order_marketplace = _Column(np.int16)
+        # one row per order line
+        self.item_day = _Column(np.int32)
+        self.item_marketplace = _Column(np.int16)
+        self.item_product = _Column(np.int32)
+        self.item_category = _Column(np.int32)
+        self.item_subtotal = _Column(np.float64)
+
+    def _marketplace_code(self, name: str) -> int:
+        code = self._marketplace_codes.get(name)
+        if code is None:
+            code = self._marketplace_codes[name] = len(self.marketplaces)
+            self.marketplaces.append(name)
+        return code
+
+    def catch_up(self, db: Session) -> None:
+        # Append every order committed since the last call
+        with self._lock:
+            now = time.monotonic()
+            self._gaps = {order_id: seen for order_id, seen in self._gaps.items() if now - seen < GAP_RETRY_SECONDS}
+            retry = list(self._gaps)
+            condition = Order.id > self.max_order_id
+            if retry:
+                condition = condition | Order.id.in_(retry)
+
+            loaded_ids = self._append_orders(db, condition)
+            if not loaded_ids:
+                return
+            for order_id in loaded_ids:
+                self._gaps.pop(order_id, None)
+            new_max = max(loaded_ids)
+            if new_max > self.max_order_id:
+                seen = set(loaded_ids)
+                for order_id in range(self.max_order_id + 1, new_max):
+                    if order_id not in seen:
+                        self._gaps[order_id] = now
+                self.max_order_id = new_max
+
+    def _append_orders(self, db: Session, condition) -> List[int]:
+        loaded_ids: List[int] = []
+        stmt = select(Order.id, Order.order_date, Order.total, Order.marketplace).where(condition)
+        result = db.execute(stmt.execution_options(yield_per=LOAD_BATCH))
+        for batch in result.partitions():
+            ids, order_dates, totals, marketplaces = zip(*batch)
+            loaded_ids.extend(ids)
+            self.order_day.extend(_to_days(order_dates))
+            self.order_total.extend(totals)
+            self.order_marketplace.extend([self._marketplace_code(name) for name in marketplaces])
+
+        stmt = select(
+            Order.order_date, Order.marketplace, OrderItem.product_id, Product.category_id, OrderItem.subtotal
+        ).join(Order, Order.id == OrderItem.order_id).join(Product, Product.id == OrderItem.product_id).where(condition)
+        result = db.execute(stmt.execution_options(yield_per=LOAD_BATCH))
+        for batch in result.partitions():
+            order_dates, marketplaces, product_ids, category_ids, subtotals = zip(*batch)
+            self.item_day.extend(_to_days(order_dates))
+            self.item_marketplace.extend([self._marketplace_code(name) for name in marketplaces])
+            self.item_product.extend(product_ids)
+            self.item_category.extend([-1 if category_id is None else category_id for category_id in category_ids])
+            self.item_subtotal.extend(subtotals)
+        return loaded_ids
+
+    def memory_usage(self) -> Dict[str, Any]:
+        order_bytes = self.order_day.nbytes + self.order_total.nbytes + self.order_marketplace.nbytes
+        item_bytes = (self.item_day.nbytes + self.item_marketplace.nbytes + self.item_product.nbytes
+                      + self.item_category.nbytes + self.item_subtotal.nbytes)
+        return {
+            "orders": self.order_day.size,
+            "order_items": self.item_day.size,
+            "bytes_per_order": order_bytes / self.order_day.size if self.order_day.size else 0,
+            "bytes_per_item": item_bytes / self.item_day.size if self.item_day.size else 0,
+            "total_bytes": order_bytes + item_bytes
+        }
+
+    def _order_mask(self, start_date: date, end_date: date) -> np.ndarray:
+        start, end = _to_days([start_date, end_date])
+        days = self.order_day.values
+        return (days >= start) & (days <= end)
+
+    def _item_mask(self, start_date: date, end_date: date) -> np.ndarray:
+        start, end = _to_days([start_date, end_date])
+        days = self.item_day.values
+        return (days >= start) & (days <= end)
+
+    def revenue_by_period(self, start_date: date, end_date: date, group_by: str = "day") -> Dict[str, Any]:
+        with self._lock:
+            mask = self._order_mask(start_date, end_date)
+            days = self.order_day.values[mask]
+            totals = self.order_total.values[mask]
+        codes, label = _period_codes(days, group_by)
+        keys, inverse = np.unique(codes, return_inverse=True)
+        revenue = np.bincount(inverse, weights=totals, minlength=len(keys))
+        counts = np.bincount(inverse, minlength=len(keys))
+
+        total_revenue = float(totals.sum())
+        order_count = int(len(totals))
+        data_points = []
+        for key, period_revenue, period_orders in zip(keys, revenue, counts):
+            data_points.append({
+                "period": label(key),
+                "revenue": float(period_revenue),
+                "order_count": int(period_orders),
+                "average_order_value": float(period_revenue / period_orders) if period_orders else 0.0
+            })
+        return {
+            "total_revenue": total_revenue,
+            "average_order_value": total_revenue / order_count if order_count else 0.0,
+            "data_points": data_points
+        }
+
+    def marketplace_performance(self, start_date: date, end_date: date) -> Dict[str, Any]:
+        with self._lock:
+            mask = self._order_mask(start_date, end_date)
+            codes = self.order_marketplace.values[mask]
+            totals = self.order_total.values[mask]
+            names = list(self.marketplaces)
+        revenue = np.bincount(codes, weights=totals, minlength=len(names))
+        counts = np.bincount(codes, minlength=len(names))
+        result = {"start_date": start_date.isoformat(), "end_date": end_date.isoformat(), "marketplaces": []}
+        for code, name in enumerate(names):
+            if counts[code]:
+                result["marketplaces"].append({
+                    "name": name,
+                    "total_sales": float(revenue[code]),
+                    "order_count": int(counts[code]),
+                    "average_order_value": float(revenue[code] / counts[code])
+                })
+        return result
+
+    def sales_by_category(self, start_date: date, end_date: date, category_names: Dict[int, str]) -> Dict[str, Any]:
+        with self._lock:
+            mask = self._item_mask(start_date, end_date)
+            categories = self.item_category.values[mask]
+            products = self.item_product.values[mask]
+            subtotals = self.item_subtotal.values[mask]
+        keep = categories >= 0
+        categories, products, subtotals = categories[keep], products[keep], subtotals[keep]
+        keys, inverse = np.unique(categories, return_inverse=True)
+        sales = np.bincount(inverse, weights=subtotals, minlength=len(keys))
+        lines = np.bincount(inverse, minlength=len(keys))
+        # distinct (category, product) pairs, packed into one int64 so unique stays 1-D
+        pairs = np.unique(inverse.astype(np.int64) * (int(products.max()) + 1 if len(products) else 1) + products)
+        distinct_products = np.bincount(pairs // (int(products.max()) + 1 if len(products) else 1), minlength=len(keys))
+
+        data = []
+        for i, category_id in enumerate(keys):
+            data.append({
+                "category_id": int(category_id),
+                "category_name": category_names.get(int(category_id), ""),
+                "total_sales": float(sales[i]),
+                "order_count": int(lines[i]),
+                "product_count": int(distinct_products[i])
+            })
+        return {"total_sales": float(subtotals.sum()), "data": data}
+
+    def slice_sales(self, start_date: date, end_date: date, by: Sequence[str]) -> List[Dict[str, Any]]:
+        # Ad hoc multi-dimensional group-by over order lines, e.g. by=("marketplace", "category", "week")
+        for dimension in by:
+            if dimension not in SLICE_DIMENSIONS:
+                raise ValueError(f"Invalid slice dimension: {dimension}")
+        with self._lock:
+            mask = self._item_mask(start_date, end_date)
+            columns = {
+                "marketplace": self.item_marketplace.values[mask],
+                "category": self.item_category.values[mask],
+                "product": self.item_product.values[mask],
+            }
+            days = self.item_day.values[mask]
+            subtotals = self.item_subtotal.values[mask]
+            names = list(self.marketplaces)
+
+        codes = []
+        labels = []
+        for dimension in by:
+            if dimension in columns:
+                codes.append(columns[dimension].astype(np.int64))
+                if dimension == "marketplace":
+                    labels.append(lambda code: names[int(code)])
+                else:
+                    labels.append(int)
+            else:
+                period_codes, label = _period_codes(days, dimension)
+                codes.append(period_codes.astype(np.int64))
+                labels.append(label)
+
+        if not by:
+            return [{"total_sales": float(subtotals.sum()), "line_count": int(len(subtotals))}]
+        # factorize each dimension, then fold them into one int64 key (mixed radix)
+        # so the group-by is a 1-D unique + bincount instead of a row-wise sort
+        uniques = []
+        combined = np.zeros(len(subtotals), dtype=np.int64)
+        for dimension_codes in codes:
+            dimension_uniques, dimension_inverse = np.unique(dimension_codes, return_inverse=True)
+            uniques.append(dimension_uniques)
+            combined = combined * len(dimension_uniques) + dimension_inverse
+        keys, inverse = np.unique(combined, return_inverse=True)
+        sales = np.bincount(inverse, weights=subtotals, minlength=len(keys))
+        lines = np.bincount(inverse, minlength=len(keys))
+
+        positions = []
+        remaining = keys.copy()
+        for dimension_uniques in reversed(uniques):
+            remaining, position = np.divmod(remaining, len(dimension_uniques))
+            positions.append(position)
+        positions.reverse()
+
+        rows = []
+        for i in range(len(keys)):
+            row = {dimension: labels[d](uniques[d][positions[d][i]]) for d, dimension in enumerate(by)}
+            row["total_sales"] = float(sales[i])
+            row["line_count"] = int(lines[i])
+            rows.append(row)
+        return rows
+
+_snapshot = OrderSnapshot()
+
+def get_snapshot(db: Session) -> OrderSnapshot:
+    # The first call loads the full history, later calls only pull new orders
+    _snapshot.catch_up(db)
+    return _snapshot
+
+def category_names(db: Session) -> Dict[int, str]:
+    return dict(db.query(Category.id, Category.name).all())
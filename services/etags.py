@@ -0,0 +1,27 @@
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+# Conditional GET helpers. The tags are weak (W/"...") because they are built
+# from a version of the data behind a response, not from its bytes, so a 304
+# can be answered before the query runs.
+
+def make_etag(*parts: Any) -> str:
+    return 'W/"%s"' % hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+
+def _opaque(tag: str) -> str:
+    # If-None-Match compares weakly: W/"x" and "x" are the same tag
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def matches(request: Request, etag: Optional[str]) -> bool:
+    header = request.headers.get("if-none-match")
+    if not etag or not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in header.split(",")}
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
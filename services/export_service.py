@@ -0,0 +1,55 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+from sqlalchemy.orm import Session
+
+# Rows are encoded and flushed in chunks so the response starts streaming
+# after the first batch instead of after the whole query.
+CHUNK_ROWS = 500
+# Rows fetched per round-trip from the server-side cursor
+YIELD_PER = 1000
+
+def iter_with_session(session_factory: Callable[[], Session], fn, *args, **kwargs) -> Iterator[Dict[str, Any]]:
+    # The export outlives the request handler, so it owns its session and
+    # closes it when the stream is exhausted or the client disconnects.
+    db = session_factory()
+    try:
+        yield from fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def encode_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    chunk: List[str] = []
+    for row in rows:
+        chunk.append(json.dumps(row, default=_json_default))
+        if len(chunk) >= CHUNK_ROWS:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+def encode_csv(rows: Iterable[Dict[str, Any]], columns: List[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    pending = 0
+    for row in rows:
+        writer.writerow({
+            key: value.isoformat() if isinstance(value, (datetime, date)) else value
+            for key, value in row.items()
+        })
+        pending += 1
+        if pending >= CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
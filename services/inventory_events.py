@@ -0,0 +1,115 @@
+import asyncio
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# In-process fan-out of stock events to /api/inventory/stream subscribers.
+# Every event gets an increasing id and the last HISTORY_SIZE events are kept,
+# so a client reconnecting with Last-Event-ID gets what it missed replayed.
+# Each subscriber has a bounded buffer; a client that falls that far behind is
+# disconnected and resumes from the history when it reconnects.
+# Events only reach subscribers of the worker process that made the change.
+
+HISTORY_SIZE = 1000
+CLIENT_BUFFER_SIZE = 100
+
+# A stock change of (product_id, previous_quantity, quantity, previous_threshold, threshold)
+StockChange = Tuple[int, int, int, int, int]
+
+OVERFLOW = object()
+
+class Subscription:
+    def __init__(self, loop: asyncio.AbstractEventLoop, buffer_size: int):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.overflowed = False
+
+    def _offer(self, event) -> None:
+        # runs on the subscriber's event loop
+        if self.overflowed:
+            return
+        if self.queue.full():
+            # drop everything undelivered so the client resumes right after the
+            # last event it actually received
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+        else:
+            self.queue.put_nowait(event)
+
+class StockEventBroker:
+    def __init__(self, history_size: int = HISTORY_SIZE, buffer_size: int = CLIENT_BUFFER_SIZE):
+        self._lock = threading.Lock()
+        self._history: deque = deque(maxlen=history_size)
+        self._subscribers: List[Subscription] = []
+        self._last_id = 0
+        self.buffer_size = buffer_size
+
+    def publish(self, events: Iterable[Dict[str, Any]]) -> None:
+        # Safe to call from the threadpool or the event loop
+        with self._lock:
+            numbered = []
+            for event in events:
+                self._last_id += 1
+                event = dict(event, id=self._last_id)
+                self._history.append(event)
+                numbered.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            for event in numbered:
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription._offer, event)
+                except RuntimeError:
+                    # the subscriber's loop is gone
+                    self.unsubscribe(subscription)
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Tuple[Subscription, List[Dict[str, Any]], bool]:
+        # Returns the subscription, the events to replay and whether the client
+        # is too far behind (or from before a restart) and must reload its state.
+        subscription = Subscription(asyncio.get_running_loop(), self.buffer_size)
+        with self._lock:
+            self._subscribers.append(subscription)
+            if last_event_id is None:
+                return subscription, [], False
+            oldest = self._history[0]["id"] if self._history else self._last_id + 1
+            reset = last_event_id > self._last_id or last_event_id < oldest - 1
+            replay = [event for event in self._history if event["id"] > last_event_id] if not reset else []
+        return subscription, replay, reset
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+broker = StockEventBroker()
+
+def publish_stock_changes(changes: Iterable[StockChange], reason: str) -> None:
+    # Call after commit. Emits stock_changed when the quantity moved, plus
+    # low_stock / stock_recovered when a product crosses its threshold in
+    # either direction (through a quantity or a threshold change).
+    events = []
+    timestamp = datetime.now().isoformat()
+    for product_id, previous_quantity, quantity, previous_threshold, threshold in changes:
+        base = {
+            "product_id": product_id,
+            "previous_quantity": previous_quantity,
+            "quantity": quantity,
+            "low_stock_threshold": threshold,
+            "reason": reason,
+            "timestamp": timestamp
+        }
+        if previous_quantity != quantity:
+            events.append(dict(base, type="stock_changed"))
+        was_low, is_low = previous_quantity < previous_threshold, quantity < threshold
+        if is_low and not was_low:
+            events.append(dict(base, type="low_stock"))
+        elif was_low and not is_low:
+            events.append(dict(base, type="stock_recovered"))
+    if events:
+        broker.publish(events)
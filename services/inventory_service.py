@@ -1,13 +1,47 @@
-from typing import List, Optional
+import itertools
+import time
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, func, select
 
 from models.inventory import Inventory, InventoryTransaction
 from models.product import Product
+from services import pagination, export_service, inventory_events, ledger_archive
 
-def get_all_inventory(db: Session, skip: int = 0, limit: int = 100) -> List[Inventory]:
-    return db.query(Inventory).offset(skip).limit(limit).all()
+# Columns of schemas.inventory.Inventory, for the list endpoint's plain rows
+_INVENTORY_LIST_COLUMNS = (
+    Inventory.id, Inventory.product_id, Inventory.quantity, Inventory.low_stock_threshold,
+    Inventory.last_restock_date, Inventory.created_at, Inventory.updated_at
+)
+
+def get_all_inventory(db: Session, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    # read-only list path, plain rows instead of ORM objects
+    return [dict(row) for row in db.execute(select(*_INVENTORY_LIST_COLUMNS).offset(skip).limit(limit)).mappings()]
+
+# Ids are handed out at INSERT but show up at COMMIT, so right after a new
+# max id appears a transaction holding a lower one may still commit. A max id
+# only counts as a version once it has stood this long.
+LEDGER_SETTLE_SECONDS = 5
+# engine -> (max id, when it was first seen), kept apart so primary and replica reads don't reset each other
+_ledger_max: Dict[Any, Tuple[int, float]] = {}
+
+def get_ledger_head(db: Session) -> Tuple[int, bool]:
+    # (MAX(id), whether it has settled). Every stock or threshold change writes
+    # a ledger row, and MAX(id) is read off the primary key.
+    max_id = db.scalar(select(func.max(InventoryTransaction.id))) or 0
+    bind = db.get_bind()
+    seen_id, seen_at = _ledger_max.get(bind, (None, 0.0))
+    if max_id != seen_id:
+        _ledger_max[bind] = (max_id, time.monotonic())
+        return max_id, False
+    return max_id, time.monotonic() - seen_at >= LEDGER_SETTLE_SECONDS
+
+def get_ledger_version(db: Session) -> Optional[int]:
+    # Cheap write version of inventory data for ETags, None while the latest
+    # id is still settling
+    max_id, settled = get_ledger_head(db)
+    return max_id if settled else None
 
 def get_product_inventory(db: Session, product_id: int) -> Optional[Inventory]:
     #Get inventory for a particular productl.
@@ -16,7 +50,9 @@ def get_product_inventory(db: Session, product_id: int) -> Optional[Inventory]:
 def get_low_stock_products(db: Session) -> List[dict]:
     results = []
     
-    # Get inventory items below threshold with related product info
+    # Get inventory items below threshold with related product info. is_low_stock
+    # is kept in sync on every stock change, so this walks the index on the flag
+    # instead of comparing two columns across the whole table.
     low_stock_items = (
         db.query(
             Inventory.product_id, 
@@ -25,8 +61,8 @@ def get_low_stock_products(db: Session) -> List[dict]:
             Product.sku,
             Product.name
         ).join(Product, Inventory.product_id == Product.id).filter(and_(
-                Product.is_active == True,
-                Inventory.quantity < Inventory.low_stock_threshold
+                Inventory.is_low_stock == True,
+                Product.is_active == True
             )).all()
     )
     
@@ -54,6 +90,7 @@ def update_inventory(
     if not inventory:
         raise ValueError(f"No inventory data found for product ID : {product_id}")
     quantity_change = new_quantity - inventory.quantity
+    previous_quantity, previous_threshold = inventory.quantity, inventory.low_stock_threshold
     transaction = InventoryTransaction(
         product_id=product_id,
         quantity_change=quantity_change,
@@ -72,16 +109,70 @@ def update_inventory(
     db.add(transaction)
     db.commit()
     db.refresh(inventory)
+    inventory_events.publish_stock_changes(
+        [(product_id, previous_quantity, inventory.quantity, previous_threshold, inventory.low_stock_threshold)],
+        "adjustment"
+    )
     
     return inventory
 
-def get_inventory_transactions(db: Session, product_id: Optional[int] = None, transaction_type: Optional[str] = None, skip: int = 0, limit: int = 100) -> List[InventoryTransaction]:
-    query = db.query(InventoryTransaction)
-    
+def _filter_transactions(query, product_id, transaction_type, start_date, end_date):
     if product_id:
         query = query.filter(InventoryTransaction.product_id == product_id)
     
     if transaction_type:
         query = query.filter(InventoryTransaction.transaction_type == transaction_type)
-    
-    return query.order_by(InventoryTransaction.created_at.desc()).offset(skip).limit(limit).all()
\ No newline at end of file
+
+    if start_date:
+        query = query.filter(InventoryTransaction.created_at >= start_date)
+    if end_date:
+        query = query.filter(InventoryTransaction.created_at <= end_date)
+    return query
+
+def get_inventory_transactions(db: Session, product_id: Optional[int] = None, transaction_type: Optional[str] = None, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    # Plain column rows like the archive yields, not ORM objects
+    stmt = select(*(getattr(InventoryTransaction, column) for column in TRANSACTION_EXPORT_COLUMNS))
+    stmt = _filter_transactions(stmt, product_id, transaction_type, start_date, end_date)
+
+    # Closed months live in ledger_archive files. Only a start_date before the
+    # archive boundary reads them, merged with the table rows: the table holds
+    # everything after the boundary, and rows backdated past it until the next
+    # archive run moves them.
+    boundary = ledger_archive.archive_boundary()
+    use_archive = boundary is not None and start_date is not None and start_date < boundary
+
+    ordered = stmt.order_by(InventoryTransaction.created_at.desc(), InventoryTransaction.id.desc())
+    if cursor:
+        ordered = ordered.where(pagination.after_cursor(InventoryTransaction.created_at, InventoryTransaction.id, cursor))
+        skip = 0
+    if not use_archive:
+        return [dict(row) for row in db.execute(ordered.offset(skip).limit(limit)).mappings()]
+
+    # the page is somewhere in the first skip + limit rows of the two streams together
+    table_rows = (dict(row) for row in db.execute(ordered.limit(skip + limit)).mappings())
+    archived = ledger_archive.iter_archived(product_id, transaction_type, start_date, end_date, pagination.decode_cursor(cursor) if cursor else None)
+    return list(itertools.islice(ledger_archive.merge_rows(table_rows, archived), skip, skip + limit))
+
+TRANSACTION_EXPORT_COLUMNS = ["id", "product_id", "quantity_change", "transaction_type", "reference_id", "note", "created_at"]
+
+def export_inventory_transactions(db: Session, product_id: Optional[int] = None, transaction_type: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    # plain column rows from a server-side cursor, same filters and order as get_inventory_transactions,
+    # merged with the archived months so the export is still the whole ledger
+    stmt = select(*(getattr(InventoryTransaction, column) for column in TRANSACTION_EXPORT_COLUMNS))
+    if product_id:
+        stmt = stmt.where(InventoryTransaction.product_id == product_id)
+    if transaction_type:
+        stmt = stmt.where(InventoryTransaction.transaction_type == transaction_type)
+    stmt = stmt.order_by(InventoryTransaction.created_at.desc(), InventoryTransaction.id.desc())
+    rows = (dict(row) for row in db.execute(stmt.execution_options(yield_per=export_service.YIELD_PER)).mappings())
+    if ledger_archive.archive_boundary() is None:
+        yield from rows
+    else:
+        yield from ledger_archive.merge_rows(rows, ledger_archive.iter_archived(product_id, transaction_type))
+
+def refresh_low_stock_flags(db: Session) -> int:
+    # Recompute is_low_stock for every row, for backfilling after the column is added
+    return db.query(Inventory).update(
+        {Inventory.is_low_stock: Inventory.quantity < Inventory.low_stock_threshold},
+        synchronize_session=False
+    )
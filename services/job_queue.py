@@ -0,0 +1,317 @@
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Type
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+import database
+from models.job import Job
+from schemas.jobs import (
+    DateRangeJobParams, RevenueJobParams, TopProductsJobParams, SalesSliceJobParams,
+    OrderExportJobParams, TransactionExportJobParams
+)
+from services import analytics_service, export_service, fast_json, inventory_service, sales_service
+
+# Long analytics queries and exports run as background jobs on a small thread
+# pool per worker process instead of holding a request thread and a pooled
+# connection for minutes. The jobs table holds each job's state, so polling and
+# cancelling work from any worker; results are files under JOB_RESULTS_DIR,
+# which every worker needs to be able to read.
+# A running analytics query can't be interrupted: cancelling it only discards
+# its result. Exports check for cancellation between chunks.
+# The workers are daemon threads on a queue rather than a ThreadPoolExecutor,
+# whose threads the interpreter joins at exit: a shutdown would otherwise wait
+# for every running job to finish.
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Jobs queued or running in this worker process beyond which submissions are refused
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "20"))
+# Seconds a finished job and its result are kept
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "86400"))
+JOB_RESULTS_DIR = os.getenv("JOB_RESULTS_DIR", "job_results")
+JOB_CANCEL_CHECK_SECONDS = 2
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+class JobQueueFull(Exception):
+    pass
+
+class JobCancelled(Exception):
+    pass
+
+class JobKind(NamedTuple):
+    params: Type[BaseModel]
+    # (params, path of the result file, callable telling whether the job was cancelled)
+    run: Callable[[Any, str, Callable[[], bool]], None]
+    media_type: Callable[[Any], str]
+
+def _analytics(params_model: Type[BaseModel], fn, *fields) -> JobKind:
+    def run(params, path: str, cancelled: Callable[[], bool]) -> None:
+        db = database.ReadSessionLocal()
+        try:
+            # positionally, so the result is shared with the analytics cache
+            result = fn(db, *(getattr(params, field) for field in fields))
+        finally:
+            db.close()
+        with open(path, "wb") as f:
+            f.write(fast_json.dumps(result))
+    return JobKind(params_model, run, lambda params: "application/json")
+
+def _export(params_model: Type[BaseModel], fn, columns, *fields, nested: bool = False) -> JobKind:
+    def run(params, path: str, cancelled: Callable[[], bool]) -> None:
+        kwargs = {"nested": params.format == "ndjson"} if nested else {}
+        rows = export_service.iter_with_session(database.ReadSessionLocal, fn, *(getattr(params, field) for field in fields), **kwargs)
+        chunks = export_service.encode_ndjson(rows) if params.format == "ndjson" else export_service.encode_csv(rows, columns)
+        try:
+            # the csv module writes its own line endings
+            with open(path, "w", newline="") as f:
+                for chunk in chunks:
+                    if cancelled():
+                        raise JobCancelled()
+                    f.write(chunk)
+        finally:
+            # closes the export's session right away if we stopped early
+            chunks.close()
+            rows.close()
+    return JobKind(params_model, run, lambda params: "application/x-ndjson" if params.format == "ndjson" else "text/csv")
+
+JOB_KINDS: Dict[str, JobKind] = {
+    "revenue": _analytics(RevenueJobParams, analytics_service.get_revenue_by_period, "start_date", "end_date", "group_by"),
+    "sales_by_category": _analytics(DateRangeJobParams, analytics_service.get_sales_by_category, "start_date", "end_date"),
+    "marketplace_performance": _analytics(DateRangeJobParams, analytics_service.get_marketplace_performance, "start_date", "end_date"),
+    "top_products": _analytics(
+        TopProductsJobParams, analytics_service.get_top_products, "start_date", "end_date", "limit", "category_id", "marketplace"
+    ),
+    "sales_slice": _analytics(SalesSliceJobParams, analytics_service.get_sales_slice, "start_date", "end_date", "by"),
+    "orders_export": _export(
+        OrderExportJobParams, sales_service.export_orders, sales_service.ORDER_EXPORT_COLUMNS,
+        "marketplace", "status", "start_date", "end_date", nested=True
+    ),
+    "inventory_transactions_export": _export(
+        TransactionExportJobParams, inventory_service.export_inventory_transactions, inventory_service.TRANSACTION_EXPORT_COLUMNS,
+        "product_id", "transaction_type"
+    ),
+}
+
+_EXTENSIONS = {"application/json": "json", "application/x-ndjson": "ndjson", "text/csv": "csv"}
+
+# (job id, kind, params) of the queued jobs, None tells a worker to stop
+_queue: "queue.Queue[Optional[Tuple[str, JobKind, Any]]]" = queue.Queue()
+_workers: List[threading.Thread] = []
+_lock = threading.Lock()
+# ids of the jobs queued or running in this process
+_pending = set()
+
+def _work() -> None:
+    while True:
+        task = _queue.get()
+        if task is None:
+            return
+        _execute(*task)
+
+def _enqueue(job_id: str, kind: "JobKind", params) -> None:
+    with _lock:
+        if not _workers:
+            for number in range(JOB_WORKERS):
+                worker = threading.Thread(target=_work, name=f"job-{number}", daemon=True)
+                worker.start()
+                _workers.append(worker)
+    _queue.put((job_id, kind, params))
+
+def _transition(job_id: str, from_statuses: Tuple[str, ...], **values) -> bool:
+    # Conditional UPDATE, so a cancel landing in between wins over the worker
+    db = database.SessionLocal()
+    try:
+        updated = db.query(Job).filter(Job.id == job_id, Job.status.in_(from_statuses)).update(values, synchronize_session=False)
+        db.commit()
+        return updated == 1
+    finally:
+        db.close()
+
+def _remove(path: Optional[str]) -> None:
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def _cancel_checker(job_id: str) -> Callable[[], bool]:
+    checked_at = time.monotonic()
+
+    def cancelled() -> bool:
+        nonlocal checked_at
+        if time.monotonic() - checked_at < JOB_CANCEL_CHECK_SECONDS:
+            return False
+        checked_at = time.monotonic()
+        db = database.SessionLocal()
+        try:
+            return db.query(Job.status).filter(Job.id == job_id).scalar() != RUNNING
+        finally:
+            db.close()
+    return cancelled
+
+def _fail(job_id: str, error: str) -> None:
+    now = datetime.now()
+    try:
+        _transition(job_id, (QUEUED, RUNNING), status=FAILED, error=error, finished_at=now, expires_at=now + timedelta(seconds=JOB_RESULT_TTL))
+    except Exception as e:
+        # it still expires like any unfinished job
+        print(f"Could not mark job {job_id} failed: {e}")
+
+def _run(job_id: str, kind: JobKind, params) -> None:
+    if not _transition(job_id, (QUEUED,), status=RUNNING, started_at=datetime.now()):
+        return  # cancelled while queued
+    media_type = kind.media_type(params)
+    os.makedirs(JOB_RESULTS_DIR, exist_ok=True)
+    path = os.path.join(JOB_RESULTS_DIR, f"{job_id}.{_EXTENSIONS[media_type]}")
+    partial = path + ".part"
+    try:
+        kind.run(params, partial, _cancel_checker(job_id))
+    except JobCancelled:
+        _remove(partial)
+        return
+    except Exception as e:
+        _remove(partial)
+        print(f"Job {job_id} failed: {e}")
+        _fail(job_id, str(e))
+        return
+    os.replace(partial, path)
+    now = datetime.now()
+    try:
+        succeeded = _transition(
+            job_id, (RUNNING,), status=SUCCEEDED, result_file=path, media_type=media_type,
+            finished_at=now, expires_at=now + timedelta(seconds=JOB_RESULT_TTL)
+        )
+    except Exception:
+        _remove(path)
+        raise
+    if not succeeded:
+        _remove(path)  # cancelled while running
+
+def _execute(job_id: str, kind: JobKind, params) -> None:
+    try:
+        _run(job_id, kind, params)
+    except Exception as e:
+        # the job's own bookkeeping failed, e.g. the database went away
+        print(f"Job {job_id} failed: {e}")
+        _fail(job_id, str(e))
+    finally:
+        with _lock:
+            _pending.discard(job_id)
+
+def _as_dict(job: Job) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "params": json.loads(job.params),
+        "status": job.status,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "expires_at": job.expires_at,
+        "result_url": f"/api/jobs/{job.id}/result" if job.status == SUCCEEDED else None
+    }
+
+def purge_expired(db: Session) -> int:
+    expired = db.query(Job.id, Job.result_file).filter(Job.expires_at < datetime.now()).all()
+    for _, result_file in expired:
+        _remove(result_file)
+    if expired:
+        db.query(Job).filter(Job.id.in_([job_id for job_id, _ in expired])).delete(synchronize_session=False)
+        db.commit()
+    return len(expired)
+
+def submit_job(db: Session, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    job_kind = JOB_KINDS.get(kind)
+    if job_kind is None:
+        raise ValueError(f"Unknown job kind: {kind}. Expected one of {', '.join(JOB_KINDS)}")
+    parsed = job_kind.params(**params)  # pydantic's ValidationError is a ValueError
+    if getattr(parsed, "start_date", None) and getattr(parsed, "end_date", None) and parsed.start_date > parsed.end_date:
+        raise ValueError("Start date must be before end date")
+
+    job_id = uuid.uuid4().hex
+    with _lock:
+        if len(_pending) >= JOB_MAX_PENDING:
+            raise JobQueueFull(f"{len(_pending)} jobs are already pending on this worker")
+        _pending.add(job_id)
+    try:
+        purge_expired(db)
+        now = datetime.now()
+        # unfinished jobs expire too, in case the worker running them goes away
+        job = Job(id=job_id, kind=kind, params=parsed.json(), status=QUEUED, created_at=now, expires_at=now + timedelta(seconds=JOB_RESULT_TTL))
+        db.add(job)
+        db.commit()
+        _enqueue(job_id, job_kind, parsed)
+    except Exception:
+        with _lock:
+            _pending.discard(job_id)
+        raise
+    return _as_dict(job)
+
+def _live_job(db: Session, job_id: str) -> Optional[Job]:
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if job is None or job.expires_at < datetime.now():
+        return None
+    return job
+
+def get_job(db: Session, job_id: str) -> Optional[Dict[str, Any]]:
+    job = _live_job(db, job_id)
+    return _as_dict(job) if job is not None else None
+
+def get_job_result(db: Session, job_id: str) -> Optional[Tuple[str, str, str]]:
+    # (path, media type, download file name) of a succeeded job's result
+    job = _live_job(db, job_id)
+    if job is None:
+        return None
+    if job.status != SUCCEEDED:
+        raise ValueError(f"Job is {job.status}")
+    if not os.path.exists(job.result_file):
+        return None
+    return job.result_file, job.media_type, f"{job.kind}.{_EXTENSIONS[job.media_type]}"
+
+def cancel_job(db: Session, job_id: str) -> Optional[Dict[str, Any]]:
+    job = _live_job(db, job_id)
+    if job is None:
+        return None
+    if job.status in FINISHED:
+        raise ValueError(f"Job is already {job.status}")
+    now = datetime.now()
+    updated = db.query(Job).filter(Job.id == job_id, Job.status.in_((QUEUED, RUNNING))).update(
+        {Job.status: CANCELLED, Job.finished_at: now, Job.expires_at: now + timedelta(seconds=JOB_RESULT_TTL)},
+        synchronize_session=False
+    )
+    db.commit()
+    db.refresh(job)
+    if not updated:
+        raise ValueError(f"Job is already {job.status}")
+    return _as_dict(job)
+
+def shutdown() -> None:
+    # Jobs of this process die with it: drop the queued ones, and fail them all
+    # so clients stop polling. Running jobs aren't waited for.
+    with _lock:
+        pending = list(_pending)
+        workers = list(_workers)
+        _workers.clear()
+    dropped = []
+    while True:
+        try:
+            task = _queue.get_nowait()
+        except queue.Empty:
+            break
+        if task is not None:
+            dropped.append(task[0])
+    with _lock:
+        _pending.difference_update(dropped)
+    for _ in workers:
+        _queue.put(None)
+    for job_id in pending:
+        _fail(job_id, "Worker shut down, submit the job again")
@@ -0,0 +1,169 @@
+import gzip
+import heapq
+import json
+import os
+from datetime import date, datetime, time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, select
+from sqlalchemy.orm import Session
+
+from models.inventory import InventoryTransaction
+from services import export_service
+
+# Closed months of inventory_transactions are moved out of the table into one
+# gzipped NDJSON file per month, newest row first, so the table only holds the
+# hot months. Reads whose date range reaches back past the archive boundary
+# merge the files back in with the table rows, which can still hold rows
+# backdated into an archived month until the next run moves them.
+# MySQL's native partitioning isn't used: partitioned InnoDB tables can't have
+# foreign keys (product_id) and would need created_at in the primary key.
+
+LEDGER_ARCHIVE_DIR = os.getenv("LEDGER_ARCHIVE_DIR", "archive/inventory_transactions")
+# Months kept in the table, the current one included
+LEDGER_HOT_MONTHS = int(os.getenv("LEDGER_HOT_MONTHS", "3"))
+DELETE_CHUNK = 5000
+
+COLUMNS = ["id", "product_id", "quantity_change", "transaction_type", "reference_id", "note", "created_at"]
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+def _previous_month(month: date) -> date:
+    return date(month.year - (month.month == 1), (month.month - 2) % 12 + 1, 1)
+
+def _month_path(month: date) -> str:
+    return os.path.join(LEDGER_ARCHIVE_DIR, f"{month:%Y-%m}.ndjson.gz")
+
+def _sort_key(row: Dict[str, Any]) -> Tuple[datetime, int]:
+    return row["created_at"], row["id"]
+
+def archived_months() -> List[date]:
+    # First day of every archived month, newest first
+    if not os.path.isdir(LEDGER_ARCHIVE_DIR):
+        return []
+    months = []
+    for name in os.listdir(LEDGER_ARCHIVE_DIR):
+        if name.endswith(".ndjson.gz"):
+            try:
+                months.append(datetime.strptime(name[:7], "%Y-%m").date())
+            except ValueError:
+                continue
+    return sorted(months, reverse=True)
+
+def archive_boundary() -> Optional[datetime]:
+    # Everything before this lives in the archive files
+    months = archived_months()
+    return datetime.combine(_next_month(months[0]), time.min) if months else None
+
+def _read_month(month: date) -> Iterator[Dict[str, Any]]:
+    with gzip.open(_month_path(month), "rt") as f:
+        for line in f:
+            row = json.loads(line)
+            row["created_at"] = datetime.fromisoformat(row["created_at"])
+            yield row
+
+def merge_rows(*sources: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    # Merge row streams in (created_at desc, id desc) order, yielding a row that
+    # is both in the table and in a file (a run that hasn't deleted it yet) once
+    previous = None
+    for row in heapq.merge(*sources, key=_sort_key, reverse=True):
+        key = _sort_key(row)
+        if key == previous:
+            continue
+        previous = key
+        yield row
+
+def iter_archived(
+    product_id: Optional[int] = None,
+    transaction_type: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    after: Optional[Tuple[datetime, int]] = None
+) -> Iterator[Dict[str, Any]]:
+    # Archived rows in (created_at desc, id desc) order, optionally starting
+    # strictly after a decoded pagination cursor. Only the months overlapping
+    # the range are opened.
+    for month in archived_months():
+        month_start = datetime.combine(month, time.min)
+        if start_date and datetime.combine(_next_month(month), time.min) <= start_date:
+            break
+        if (end_date and month_start > end_date) or (after and month_start > after[0]):
+            continue
+        for row in _read_month(month):
+            if start_date and row["created_at"] < start_date:
+                break
+            if (end_date and row["created_at"] > end_date) or (after and _sort_key(row) >= after):
+                continue
+            if product_id and row["product_id"] != product_id:
+                continue
+            if transaction_type and row["transaction_type"] != transaction_type:
+                continue
+            yield row
+
+def _archive_month(db: Session, month: date) -> int:
+    start = datetime.combine(month, time.min)
+    end = datetime.combine(_next_month(month), time.min)
+    in_month = and_(InventoryTransaction.created_at >= start, InventoryTransaction.created_at < end)
+    max_id = db.query(func.max(InventoryTransaction.id)).filter(in_month).scalar()
+    if max_id is None:
+        return 0
+    in_month = and_(in_month, InventoryTransaction.id <= max_id)
+
+    # Stream the month out newest first, merged with what an earlier run already
+    # archived (late backdated rows, or a run that died before deleting)
+    stmt = (
+        select(*(getattr(InventoryTransaction, column) for column in COLUMNS))
+        .where(in_month)
+        .order_by(InventoryTransaction.created_at.desc(), InventoryTransaction.id.desc())
+        .execution_options(yield_per=export_service.YIELD_PER)
+    )
+    # ids of the table rows written, the only ones deleted afterwards: a row
+    # backdated into the month that commits meanwhile stays for the next run
+    written = []
+
+    def table_rows() -> Iterator[Dict[str, Any]]:
+        for row in db.execute(stmt).mappings():
+            written.append(row["id"])
+            yield dict(row)
+
+    sources = [table_rows()]
+    path = _month_path(month)
+    if os.path.exists(path):
+        sources.append(_read_month(month))
+
+    os.makedirs(LEDGER_ARCHIVE_DIR, exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            for row in merge_rows(*sources):
+                f.write((json.dumps(row, default=export_service._json_default) + "\n").encode())
+        raw.flush()
+        os.fsync(raw.fileno())
+    # The file is complete and durable before any row leaves the table
+    os.replace(temp_path, path)
+
+    for start in range(0, len(written), DELETE_CHUNK):
+        db.execute(delete(InventoryTransaction).where(InventoryTransaction.id.in_(written[start:start + DELETE_CHUNK])))
+        db.commit()
+    return len(written)
+
+def archive_closed_months(db: Session, hot_months: int = LEDGER_HOT_MONTHS, today: Optional[date] = None) -> List[Tuple[date, int]]:
+    # Move every month before the last hot_months into the archive. Returns
+    # (month, rows moved) per archived month. Safe to re-run.
+    if hot_months < 1:
+        raise ValueError("At least the current month has to stay in the table")
+    cutoff_month = date.today().replace(day=1) if today is None else today.replace(day=1)
+    for _ in range(hot_months - 1):
+        cutoff_month = _previous_month(cutoff_month)
+    oldest = db.query(func.min(InventoryTransaction.created_at)).filter(
+        InventoryTransaction.created_at < datetime.combine(cutoff_month, time.min)
+    ).scalar()
+    archived = []
+    month = oldest.date().replace(day=1) if oldest else cutoff_month
+    while month < cutoff_month:
+        moved = _archive_month(db, month)
+        if moved:
+            archived.append((month, moved))
+        month = _next_month(month)
+    return archived
@@ -0,0 +1,40 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+# Keyset pagination helpers. A cursor is an opaque token wrapping the
+# (timestamp, id) of the last row on a page; the next page starts strictly
+# after it so the database seeks into the index instead of skipping rows.
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    payload = json.dumps([timestamp.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid pagination cursor")
+
+def after_cursor(timestamp_column, id_column, cursor: str):
+    # Filter for rows that come after the cursor in (timestamp desc, id desc) order.
+    # Written as an OR instead of a row comparison so MySQL can range-scan the index.
+    timestamp, row_id = decode_cursor(cursor)
+    return or_(
+        timestamp_column < timestamp,
+        and_(timestamp_column == timestamp, id_column < row_id)
+    )
+
+def next_cursor(rows: List, limit: int, timestamp_attr: str) -> Optional[str]:
+    # Only a full page can have a next page. Rows are ORM objects or plain dicts.
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    if isinstance(last, dict):
+        return encode_cursor(last[timestamp_attr], last["id"])
+    return encode_cursor(getattr(last, timestamp_attr), last.id)
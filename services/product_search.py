@@ -0,0 +1,222 @@
+import heapq
+import math
+import re
+import sys
+import threading
+from array import array
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from models.product import CatalogVersion, Product
+from services import catalog_cache
+
+# In-process search index over active products, per worker. Each term has a
+# sorted array of product_id << 3 | mask of the fields it occurs in (8 bytes a
+# posting, where a dict would take ~70), searched with bisect. A sorted list of
+# all terms answers prefix lookups with two bisects, which is what a trie would
+# give us at a fraction of its memory in Python. The index is built from the
+# products table on first use and brought up to date whenever the catalog
+# version moves: products whose updated_at is at or after the last one seen
+# are re-read and re-indexed, so writes on any worker show up without a rebuild.
+
+SKU, NAME, DESCRIPTION = 4, 2, 1
+# Score of a term occurring in the fields of a mask
+FIELD_WEIGHTS = [(3 if mask & SKU else 0) + (2 if mask & NAME else 0) + (1 if mask & DESCRIPTION else 0) for mask in range(8)]
+# A prefix match counts less than the whole word
+PREFIX_FACTOR = 0.5
+# Terms a prefix may expand to
+PREFIX_EXPANSIONS = 200
+# updated_at comes from the database clock at statement time, so a write that
+# committed late can carry an older timestamp than one already indexed
+REFRESH_OVERLAP = timedelta(minutes=1)
+LOAD_YIELD_PER = 10000
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN.findall(text.lower()) if text else []
+
+def _mask(postings: array, product_id: int) -> int:
+    i = bisect_left(postings, product_id << 3)
+    if i < len(postings) and postings[i] >> 3 == product_id:
+        return postings[i] & 7
+    return 0
+
+class ProductSearchIndex:
+    def __init__(self):
+        self.postings: Dict[str, array] = {}
+        self.terms: List[str] = []
+        # product_id -> (sku, name, indexed terms)
+        self.docs: Dict[int, Tuple[str, str, Tuple[str, ...]]] = {}
+
+    def add(self, product_id: int, sku: str, name: str, description: Optional[str]) -> None:
+        self.remove(product_id)
+        masks: Dict[str, int] = {}
+        for field, text in ((SKU, sku), (NAME, name), (DESCRIPTION, description)):
+            for term in tokenize(text):
+                # one string object per distinct term, not one per product
+                term = sys.intern(term)
+                masks[term] = masks.get(term, 0) | field
+        for term, mask in masks.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = array("q")
+                # while bulk loading the terms list is sorted once at the end
+                if self.terms is not None:
+                    insort(self.terms, term)
+            value = product_id << 3 | mask
+            if not postings or postings[-1] < value:
+                postings.append(value)
+            else:
+                insort(postings, value)
+        self.docs[product_id] = (sku, name, tuple(masks))
+
+    def remove(self, product_id: int) -> None:
+        doc = self.docs.pop(product_id, None)
+        if doc is None:
+            return
+        for term in doc[2]:
+            postings = self.postings[term]
+            del postings[bisect_left(postings, product_id << 3)]
+            if not postings:
+                del self.postings[term]
+                del self.terms[bisect_left(self.terms, term)]
+
+    def load(self, rows: Iterable[Any]) -> None:
+        # rows in id order, so postings are appended already sorted
+        self.terms = None
+        for row in rows:
+            self.add(row.id, row.sku, row.name, row.description)
+        self.terms = sorted(self.postings)
+
+    def _expand(self, prefix: str) -> List[str]:
+        start = bisect_left(self.terms, prefix)
+        end = bisect_left(self.terms, prefix + "\uffff", start)
+        return self.terms[start:min(end, start + PREFIX_EXPANSIONS)]
+
+    def search(self, tokens: List[str], prefix_last: bool, fields: int, limit: int) -> List[Tuple[float, int]]:
+        # Top (score, product_id) pairs of products matching every token in
+        # one of the given fields; the last token may match as a prefix
+        count = len(self.docs)
+        matchers = []
+        for position, token in enumerate(tokens):
+            candidates = [(token, 1.0)] if token in self.postings else []
+            if prefix_last and position == len(tokens) - 1:
+                candidates += [(term, PREFIX_FACTOR) for term in self._expand(token) if term != token]
+            if not candidates:
+                return []
+            matchers.append([
+                (self.postings[term], factor * math.log(1 + count / len(self.postings[term])))
+                for term, factor in candidates
+            ])
+
+        # Score the smallest posting lists in full and only look the
+        # candidates up in the others
+        matchers.sort(key=lambda matcher: sum(len(postings) for postings, _ in matcher))
+        scores: Dict[int, float] = {}
+        for postings, weight in matchers[0]:
+            for value in postings:
+                term_score = FIELD_WEIGHTS[value & fields] * weight
+                if term_score > scores.get(value >> 3, 0):
+                    scores[value >> 3] = term_score
+        scored = []
+        for product_id, total in scores.items():
+            for matcher in matchers[1:]:
+                term_score = max(FIELD_WEIGHTS[_mask(postings, product_id) & fields] * weight for postings, weight in matcher)
+                if not term_score:
+                    break
+                total += term_score
+            else:
+                scored.append((total, product_id))
+        # shorter names first among equal scores
+        return heapq.nsmallest(limit, scored, key=lambda item: (-item[0], len(self.docs[item[1]][1]), item[1]))
+
+_index: Optional[ProductSearchIndex] = None
+_version: Optional[int] = None
+_synced_at: Optional[datetime] = None
+_lock = threading.Lock()
+
+def _rows(db: Session, since: Optional[datetime] = None):
+    stmt = select(Product.id, Product.sku, Product.name, Product.description, Product.is_active)
+    stmt = stmt.where(Product.is_active == True) if since is None else stmt.where(Product.updated_at >= since)
+    return db.execute(stmt.order_by(Product.id).execution_options(yield_per=LOAD_YIELD_PER))
+
+def _ensure_current(db: Session) -> ProductSearchIndex:
+    global _index, _version, _synced_at
+    catalog_cache.cache.start_polling()
+    with _lock:
+        if _index is not None and _version == catalog_cache.cache.version:
+            return _index
+        # Read the version first: a write landing while we load moves it
+        # again and the next search catches up
+        version = db.scalar(select(CatalogVersion.version).where(CatalogVersion.id == 1)) or 0
+        synced_at = db.scalar(select(func.max(Product.updated_at)))
+        if _index is None:
+            index = ProductSearchIndex()
+            index.load(_rows(db))
+            _index = index
+        elif _synced_at is not None:
+            for row in _rows(db, _synced_at - REFRESH_OVERLAP):
+                if row.is_active:
+                    _index.add(row.id, row.sku, row.name, row.description)
+                else:
+                    _index.remove(row.id)
+        elif synced_at is not None:
+            # the table was empty when the index was built
+            _index.load(_rows(db))
+        _version, _synced_at = version, synced_at
+        catalog_cache.cache.observe(version)
+        return _index
+
+def warm_up(db: Session) -> None:
+    _ensure_current(db)
+
+def search_products(db: Session, q: str, limit: int = 20) -> List[Dict[str, Any]]:
+    tokens = tokenize(q)
+    if not tokens:
+        return []
+    index = _ensure_current(db)
+    with _lock:
+        ranked = index.search(tokens, not q[-1].isspace(), SKU | NAME | DESCRIPTION, limit)
+    if not ranked:
+        return []
+
+    rows = db.query(Product).filter(Product.id.in_([product_id for _, product_id in ranked])).all()
+    products = {product.id: product for product in rows}
+    results = []
+    for score, product_id in ranked:
+        product = products.get(product_id)
+        # deactivated on another worker since our last refresh
+        if product is None or not product.is_active:
+            continue
+        results.append({
+            "id": product.id,
+            "sku": product.sku,
+            "name": product.name,
+            "description": product.description,
+            "price": product.price,
+            "category_id": product.category_id,
+            "image_url": product.image_url,
+            "is_active": product.is_active,
+            "created_at": product.created_at,
+            "updated_at": product.updated_at,
+            "score": round(score, 4)
+        })
+    return results
+
+def autocomplete_products(db: Session, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+    # Answered from the index alone: matches on SKU and name only
+    tokens = tokenize(prefix)
+    if not tokens:
+        return []
+    index = _ensure_current(db)
+    with _lock:
+        ranked = index.search(tokens, True, SKU | NAME, limit)
+        return [
+            {"id": product_id, "sku": index.docs[product_id][0], "name": index.docs[product_id][1]}
+            for _, product_id in ranked
+        ]
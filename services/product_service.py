@@ -4,7 +4,9 @@ from sqlalchemy.exc import IntegrityError
 
 from models.product import Product, Category
 from schemas.product import ProductCreate, ProductUpdate, CategoryCreate
+from services import catalog_cache
 
+@catalog_cache.cached
 def get_products(db: Session, skip: int = 0, limit: int = 100, category_id: Optional[int] = None) -> List[Product]:
     query = db.query(Product).filter(Product.is_active == True)
     
@@ -13,6 +15,7 @@ def get_products(db: Session, skip: int = 0, limit: int = 100, category_id: Opti
     
     return query.offset(skip).limit(limit).all()
 
+@catalog_cache.cached
 def get_product(db: Session, product_id: int) -> Optional[Product]:
     return db.query(Product).filter(
         Product.id == product_id,
@@ -23,9 +26,11 @@ def create_product(db: Session, product_data: ProductCreate) -> Product:
     #Creating a new product
     db_product = Product(**product_data.dict())
     db.add(db_product)
+    version = catalog_cache.bump_version(db)
     
     try:
         db.commit()
+        catalog_cache.invalidate(version)
         db.refresh(db_product)
         return db_product
     except IntegrityError:
@@ -46,7 +51,9 @@ def update_product(
     for key, value in product_data.dict(exclude_unset=True).items():
         setattr(db_product, key, value)
     
+    version = catalog_cache.bump_version(db)
     db.commit()
+    catalog_cache.invalidate(version)
     db.refresh(db_product)
     return db_product
 
@@ -58,17 +65,22 @@ def delete_product(db: Session, product_id: int) -> bool:
         return False
     
     db_product.is_active = False
+    version = catalog_cache.bump_version(db)
     db.commit()
+    catalog_cache.invalidate(version)
     return True
 
+@catalog_cache.cached
 def get_categories(db: Session) -> List[Category]:
     return db.query(Category).all()
 
 def create_category(db: Session, category_data: CategoryCreate) -> Category:
     db_category = Category(**category_data.dict())
     db.add(db_category)
+    version = catalog_cache.bump_version(db)
     try:
         db.commit()
+        catalog_cache.invalidate(version)
         db.refresh(db_category)
         return db_category
     except IntegrityError:
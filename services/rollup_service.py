@@ -0,0 +1,164 @@
+from typing import Dict, Iterable, Tuple
+from datetime import datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import Date, cast, func, case, select, insert
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from models.sales import Order, OrderItem, DailySalesRollup, DailyProductSalesRollup, MonthlyProductSalesRollup
+
+# (product_id, quantity, subtotal) for every line of an order
+OrderLine = Tuple[int, int, float]
+
+def _upsert(db: Session, model, keys: Dict, increments: Dict) -> None:
+    # Add the increments to the row identified by keys, creating it if needed.
+    # Done as a single INSERT .. ON DUPLICATE KEY / ON CONFLICT so concurrent
+    # orders for the same day never lose an update.
+    values = {**keys, **increments}
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "mysql":
+        stmt = mysql.insert(table).values(**values)
+        stmt = stmt.on_duplicate_key_update(
+            {col: table.c[col] + stmt.inserted[col] for col in increments}
+        )
+        db.execute(stmt)
+    elif dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = dialect_insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={col: table.c[col] + stmt.excluded[col] for col in increments}
+        )
+        db.execute(stmt)
+    else:
+        row = db.get(model, tuple(keys.values()), with_for_update=True)
+        if row is None:
+            db.add(model(**values))
+            db.flush()
+        else:
+            for col, amount in increments.items():
+                setattr(row, col, getattr(row, col) + amount)
+
+def month_start(column, dialect: str):
+    # First day of the month of a DATE column, in SQL
+    if dialect == "mysql":
+        return func.date(func.date_format(column, "%Y-%m-01"))
+    if dialect == "sqlite":
+        return func.date(column, "start of month")
+    return cast(func.date_trunc("month", column), Date)
+
+def record_orders(db: Session, orders: Iterable[Tuple[datetime, str, float, Iterable[OrderLine], bool]]) -> None:
+    # Fold a batch of (order_date, marketplace, total, lines, cancelled) into the
+    # rollups with one upsert per touched (day, marketplace), (day, product) and
+    # (month, product).
+    # Called from the same transaction that inserts the orders.
+    per_marketplace: Dict[Tuple, list] = {}
+    per_product: Dict[Tuple, list] = {}
+    per_product_month: Dict[Tuple, list] = {}
+    for order_date, marketplace, total, lines, cancelled in orders:
+        day = order_date.date()
+        totals = per_marketplace.setdefault((day, marketplace), [0.0, 0, 0.0, 0])
+        totals[0] += total
+        totals[1] += 1
+        if cancelled:
+            totals[2] += total
+            totals[3] += 1
+        for product_id, quantity, subtotal in lines:
+            for totals in (
+                per_product.setdefault((day, product_id), [0.0, 0, 0]),
+                per_product_month.setdefault((day.replace(day=1), product_id), [0.0, 0, 0])
+            ):
+                totals[0] += subtotal
+                totals[1] += quantity
+                totals[2] += 1
+
+    for day, marketplace in sorted(per_marketplace):
+        revenue, order_count, cancelled_revenue, cancelled_order_count = per_marketplace[(day, marketplace)]
+        _upsert(db, DailySalesRollup, {"day": day, "marketplace": marketplace}, {
+            "revenue": revenue,
+            "order_count": order_count,
+            "cancelled_revenue": cancelled_revenue,
+            "cancelled_order_count": cancelled_order_count
+        })
+
+    for day, product_id in sorted(per_product):
+        total_sales, units_sold, line_count = per_product[(day, product_id)]
+        _upsert(db, DailyProductSalesRollup, {"day": day, "product_id": product_id}, {
+            "total_sales": total_sales,
+            "units_sold": units_sold,
+            "line_count": line_count
+        })
+
+    for month, product_id in sorted(per_product_month):
+        total_sales, units_sold, line_count = per_product_month[(month, product_id)]
+        _upsert(db, MonthlyProductSalesRollup, {"month": month, "product_id": product_id}, {
+            "total_sales": total_sales,
+            "units_sold": units_sold,
+            "line_count": line_count
+        })
+
+def record_order(
+    db: Session,
+    order_date: datetime,
+    marketplace: str,
+    total: float,
+    lines: Iterable[OrderLine],
+    cancelled: bool = False
+) -> None:
+    record_orders(db, [(order_date, marketplace, total, lines, cancelled)])
+
+def record_status_change(db: Session, order: Order, old_status: str, new_status: str) -> None:
+    # Revenue totals include every order regardless of status, only the
+    # cancelled share moves when an order crosses the cancelled boundary.
+    if (old_status == "cancelled") == (new_status == "cancelled"):
+        return
+    sign = 1 if new_status == "cancelled" else -1
+    _upsert(db, DailySalesRollup, {"day": order.order_date.date(), "marketplace": order.marketplace}, {
+        "revenue": 0.0,
+        "order_count": 0,
+        "cancelled_revenue": sign * order.total,
+        "cancelled_order_count": sign
+    })
+
+def rebuild_rollups(db: Session) -> None:
+    # Recompute the rollup tables from scratch out of orders/order_items.
+    # Used to backfill existing history and to repair drift.
+    db.query(DailySalesRollup).delete()
+    db.query(DailyProductSalesRollup).delete()
+    db.query(MonthlyProductSalesRollup).delete()
+
+    order_day = func.date(Order.order_date)
+    is_cancelled = Order.status == "cancelled"
+    db.execute(insert(DailySalesRollup).from_select(
+        ["day", "marketplace", "revenue", "order_count", "cancelled_revenue", "cancelled_order_count"],
+        select(
+            order_day,
+            Order.marketplace,
+            func.sum(Order.total),
+            func.count(Order.id),
+            func.sum(case((is_cancelled, Order.total), else_=0.0)),
+            func.sum(case((is_cancelled, 1), else_=0))
+        ).group_by(order_day, Order.marketplace)
+    ))
+    db.execute(insert(DailyProductSalesRollup).from_select(
+        ["day", "product_id", "total_sales", "units_sold", "line_count"],
+        select(
+            order_day,
+            OrderItem.product_id,
+            func.sum(OrderItem.subtotal),
+            func.sum(OrderItem.quantity),
+            func.count(OrderItem.id)
+        ).join(Order, Order.id == OrderItem.order_id).group_by(order_day, OrderItem.product_id)
+    ))
+    month = month_start(DailyProductSalesRollup.day, db.get_bind().dialect.name)
+    db.execute(insert(MonthlyProductSalesRollup).from_select(
+        ["month", "product_id", "total_sales", "units_sold", "line_count"],
+        select(
+            month,
+            DailyProductSalesRollup.product_id,
+            func.sum(DailyProductSalesRollup.total_sales),
+            func.sum(DailyProductSalesRollup.units_sold),
+            func.sum(DailyProductSalesRollup.line_count)
+        ).group_by(month, DailyProductSalesRollup.product_id)
+    ))
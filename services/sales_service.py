@@ -1,24 +1,26 @@
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, Iterator
 from datetime import datetime
 import uuid
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, case, insert, update, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 from models.sales import Order, OrderItem
 from models.inventory import Inventory, InventoryTransaction
+from models.product import Product
 from schemas.sales import OrderCreate
+from services import rollup_service, pagination, analytics_cache, export_service, inventory_events
 
-def get_orders(
-    db: Session,
-    marketplace: Optional[str] = None,
-    status: Optional[str] = None,
-    start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None,
-    skip: int = 0,
-    limit: int = 100
-) -> List[Order]:
-    query = db.query(Order)
-    
+# Order.items is a lazy relationship and every response nests it, so read paths
+# load items up front with one batched "WHERE order_id IN (...)" per page
+# instead of one SELECT per order during serialization.
+ORDER_LOAD_OPTIONS = (selectinload(Order.items),)
+
+def _order_query(db: Session):
+    return db.query(Order).options(*ORDER_LOAD_OPTIONS)
+
+def _filter_orders(query, marketplace, status, start_date, end_date):
+    # shared by the list and export endpoints, works on a Query or a select()
     if marketplace:
         query = query.filter(Order.marketplace == marketplace)
     if status:
@@ -29,15 +31,163 @@ def get_orders(
         query = query.filter(Order.order_date >= start_date)
     elif end_date:
         query = query.filter(Order.order_date <= end_date)
+    return query
+
+# Columns of schemas.sales.Order / OrderItem, for the list endpoint's plain rows
+_ORDER_LIST_COLUMNS = (
+    Order.id, Order.order_number, Order.order_date, Order.status, Order.payment_status,
+    Order.subtotal, Order.tax, Order.shipping_cost, Order.discount, Order.total,
+    Order.marketplace, Order.created_at, Order.updated_at
+)
+_ITEM_LIST_COLUMNS = (OrderItem.id, OrderItem.product_id, OrderItem.quantity, OrderItem.unit_price, OrderItem.subtotal, OrderItem.created_at)
+_ITEM_LIST_KEYS = [column.key for column in _ITEM_LIST_COLUMNS]
+
+def get_orders(
+    db: Session,
+    marketplace: Optional[str] = None,
+    status: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    # Read-only list path: plain column rows shaped like schemas.sales.Order,
+    # without building ORM objects or identity-map state for every order and line
+    stmt = _filter_orders(select(*_ORDER_LIST_COLUMNS), marketplace, status, start_date, end_date)
+    stmt = stmt.order_by(Order.order_date.desc(), Order.id.desc())
+    # a cursor seeks straight to the page, skip is only kept for old clients
+    if cursor:
+        stmt = stmt.where(pagination.after_cursor(Order.order_date, Order.id, cursor))
+    else:
+        stmt = stmt.offset(skip)
+    orders = [dict(row) for row in db.execute(stmt.limit(limit)).mappings()]
+
+    # all lines of the page in one IN query, like selectinload would
+    items_by_order = {}
+    for order in orders:
+        order["items"] = items_by_order[order["id"]] = []
+    if items_by_order:
+        stmt = select(OrderItem.order_id, *_ITEM_LIST_COLUMNS).where(OrderItem.order_id.in_(items_by_order)).order_by(OrderItem.id)
+        for order_id, *values in db.execute(stmt):
+            items_by_order[order_id].append(dict(zip(_ITEM_LIST_KEYS, values)))
+    return orders
+
+ORDER_EXPORT_COLUMNS = [
+    "order_id", "order_number", "order_date", "status", "payment_status", "subtotal", "tax",
+    "shipping_cost", "discount", "total", "marketplace", "item_id", "product_id", "quantity",
+    "unit_price", "item_subtotal"
+]
+_ORDER_FIELDS = ORDER_EXPORT_COLUMNS[:11]
+_ITEM_FIELDS = ORDER_EXPORT_COLUMNS[11:]
+
+def export_orders(
+    db: Session,
+    marketplace: Optional[str] = None,
+    status: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    nested: bool = False
+) -> Iterator[Dict[str, Any]]:
+    # Streams plain column rows (no ORM objects) from a server-side cursor, one
+    # row per order line. With nested=True consecutive lines are folded back
+    # into one dict per order with an "items" list.
+    stmt = select(
+        Order.id.label("order_id"), Order.order_number, Order.order_date, Order.status,
+        Order.payment_status, Order.subtotal, Order.tax, Order.shipping_cost, Order.discount,
+        Order.total, Order.marketplace, OrderItem.id.label("item_id"), OrderItem.product_id,
+        OrderItem.quantity, OrderItem.unit_price, OrderItem.subtotal.label("item_subtotal")
+    ).outerjoin(OrderItem, OrderItem.order_id == Order.id)
+    stmt = _filter_orders(stmt, marketplace, status, start_date, end_date)
+    stmt = stmt.order_by(Order.order_date.desc(), Order.id.desc(), OrderItem.id)
+    rows = db.execute(stmt.execution_options(yield_per=export_service.YIELD_PER)).mappings()
     
-    return query.order_by(Order.order_date.desc()).offset(skip).limit(limit).all()
+    if not nested:
+        for row in rows:
+            yield dict(row)
+        return
+    
+    current = None
+    for row in rows:
+        if current is None or current["order_id"] != row["order_id"]:
+            if current is not None:
+                yield current
+            current = {field: row[field] for field in _ORDER_FIELDS}
+            current["items"] = []
+        if row["item_id"] is not None:
+            current["items"].append({field: row[field] for field in _ITEM_FIELDS})
+    if current is not None:
+        yield current
 
 #get order by id
 def get_order(db: Session, order_id: int) -> Optional[Order]:
-    return db.query(Order).filter(Order.id == order_id).first()
+    return _order_query(db).filter(Order.id == order_id).first()
+
+class InsufficientStockError(ValueError):
+    pass
+
+def _quantities_by_product(items, sign: int) -> Dict[int, int]:
+    quantities: Dict[int, int] = {}
+    for item in items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + sign * item.quantity
+    return quantities
+
+def _read_stock_changes(db: Session, changes: Dict[int, int]) -> List[inventory_events.StockChange]:
+    # Read the new levels back (inside the transaction, after the UPDATEs) to
+    # describe what changed for the stock event stream
+    rows = db.query(Inventory.product_id, Inventory.quantity, Inventory.low_stock_threshold).filter(
+        Inventory.product_id.in_(changes.keys())
+    ).all()
+    return [
+        (product_id, quantity - changes[product_id], quantity, threshold, threshold)
+        for product_id, quantity, threshold in rows
+    ]
+
+def _change_stock(db: Session, changes: Dict[int, int]) -> List[inventory_events.StockChange]:
+    # Apply stock changes as conditional UPDATEs evaluated inside the database,
+    # so concurrent orders for the same SKU can't overwrite each other. Rows are
+    # touched in product_id order so two orders never wait on each other's locks
+    # in opposite order. Returns the changes for products that have an inventory row.
+    tracked = set()
+    for product_id in sorted(changes):
+        change = changes[product_id]
+        stmt = update(Inventory).where(Inventory.product_id == product_id).ordered_values(
+            (Inventory.is_low_stock, Inventory.low_stock_after(change)),
+            (Inventory.quantity, Inventory.quantity + change)
+        ).execution_options(synchronize_session=False)
+        if change < 0:
+            stmt = stmt.where(Inventory.quantity >= -change)
+        
+        if db.execute(stmt).rowcount:
+            tracked.add(product_id)
+        elif db.query(Inventory.id).filter(Inventory.product_id == product_id).first():
+            # the row exists, so the WHERE on quantity is what failed
+            raise InsufficientStockError(f"Insufficient stock for product ID : {product_id}")
+    if not tracked:
+        return []
+    return _read_stock_changes(db, {product_id: changes[product_id] for product_id in tracked})
+
+# Attempts at inserting a bulk batch's orders when an order number is already taken
+ORDER_NUMBER_ATTEMPTS = 3
+
+def _new_order_number() -> str:
+    # All 128 bits of the uuid: 8 hex digits start colliding once the table
+    # holds millions of orders, and the column is unique
+    return f"ORD-{uuid.uuid4().hex.upper()}"
 
 def create_order(db: Session, order_data: OrderCreate) -> Order:
-    order_number = f"ORD-{uuid.uuid4().hex[:8].upper()}"
+    order_number = _new_order_number()
+    
+    # Take the stock first so an order that can't be fulfilled fails before anything is written
+    stock_changes = []
+    if order_data.status != "cancelled":
+        try:
+            stock_changes = _change_stock(db, _quantities_by_product(order_data.items, -1))
+        except InsufficientStockError:
+            db.rollback()
+            raise
+    tracked_products = {change[0] for change in stock_changes}
+    
     db_order = Order(
         order_number=order_number,
         order_date=order_data.order_date,
@@ -64,45 +214,46 @@ def create_order(db: Session, order_data: OrderCreate) -> Order:
             created_at=order_data.order_date
         )
         db.add(order_item)
-        if order_data.status != "cancelled":
-            inventory = db.query(Inventory).filter(
-                Inventory.product_id == item_data.product_id
-            ).first()
-            
-            if inventory:
-                inventory.quantity = max(0, inventory.quantity - item_data.quantity)
-                transaction = InventoryTransaction(
-                    product_id=item_data.product_id,
-                    quantity_change=-item_data.quantity,
-                    transaction_type="sale",
-                    reference_id=order_number,
-                    created_at=order_data.order_date
-                )
-                db.add(transaction)
+        if item_data.product_id in tracked_products:
+            transaction = InventoryTransaction(
+                product_id=item_data.product_id,
+                quantity_change=-item_data.quantity,
+                transaction_type="sale",
+                reference_id=order_number,
+                created_at=order_data.order_date
+            )
+            db.add(transaction)
     
+    rollup_service.record_order(
+        db,
+        order_data.order_date,
+        order_data.marketplace,
+        order_data.total,
+        [(item.product_id, item.quantity, item.quantity * item.unit_price) for item in order_data.items],
+        cancelled=order_data.status == "cancelled"
+    )
     db.commit()
-    db.refresh(db_order)
-    return db_order
+    analytics_cache.invalidate_dates([order_data.order_date.date()])
+    inventory_events.publish_stock_changes(stock_changes, "order")
+    return get_order(db, db_order.id)
 
 def update_order_status(db: Session, order_id: int, new_status: str) -> Optional[Order]:
-    db_order = db.query(Order).filter(Order.id == order_id).first()
+    # Lock the order so two concurrent cancellations can't both restore its stock
+    db_order = db.query(Order).filter(Order.id == order_id).with_for_update().first()
     if not db_order:
         return None
     old_status = db_order.status
     db_order.status = new_status    
+    stock_changes = []
     if old_status != new_status:
         # If order was not cancelled but is now cancelled, restore inventory
         if old_status != "cancelled" and new_status == "cancelled":
             order_items = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
+            stock_changes = _change_stock(db, _quantities_by_product(order_items, 1))
+            tracked_products = {change[0] for change in stock_changes}
             
             for item in order_items:
-                inventory = db.query(Inventory).filter(
-                    Inventory.product_id == item.product_id
-                ).first()
-                
-                if inventory:
-                    inventory.quantity += item.quantity
-                    
+                if item.product_id in tracked_products:
                     transaction = InventoryTransaction(
                         product_id=item.product_id,
                         quantity_change=item.quantity,
@@ -116,16 +267,15 @@ def update_order_status(db: Session, order_id: int, new_status: str) -> Optional
         # If order was cancelled but is now not cancelled, reduce inventory
         elif old_status == "cancelled" and new_status != "cancelled":
             order_items = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
+            try:
+                stock_changes = _change_stock(db, _quantities_by_product(order_items, -1))
+            except InsufficientStockError:
+                db.rollback()
+                raise
+            tracked_products = {change[0] for change in stock_changes}
             
             for item in order_items:
-                inventory = db.query(Inventory).filter(
-                    Inventory.product_id == item.product_id
-                ).first()
-                
-                if inventory:
-                    # Reduce inventory
-                    inventory.quantity = max(0, inventory.quantity - item.quantity)
-                    
+                if item.product_id in tracked_products:
                     #create inventory transaction
                     transaction = InventoryTransaction(
                         product_id=item.product_id,
@@ -136,7 +286,183 @@ def update_order_status(db: Session, order_id: int, new_status: str) -> Optional
                         created_at=datetime.now()
                     )
                     db.add(transaction)
+        
+        rollup_service.record_status_change(db, db_order, old_status, new_status)
     
     db.commit()
-    db.refresh(db_order)
-    return db_order
\ No newline at end of file
+    if old_status != new_status:
+        analytics_cache.invalidate_dates([db_order.order_date.date()])
+        inventory_events.publish_stock_changes(stock_changes, "cancellation" if new_status == "cancelled" else "order")
+    return get_order(db, db_order.id)
+
+def _insert_orders(db: Session, order_rows: Dict[int, Dict[str, Any]]) -> None:
+    # Insert a batch's orders, giving the rows whose number is already taken a
+    # new one and trying again, instead of failing the whole batch
+    for attempt in range(ORDER_NUMBER_ATTEMPTS):
+        try:
+            with db.begin_nested():
+                db.execute(insert(Order), list(order_rows.values()))
+            return
+        except IntegrityError:
+            if attempt == ORDER_NUMBER_ATTEMPTS - 1:
+                raise
+            numbers = {row["order_number"] for row in order_rows.values()}
+            taken = set(db.scalars(select(Order.order_number).where(Order.order_number.in_(numbers))))
+            for row in order_rows.values():
+                # a clash with a row this transaction can't see yet renumbers them all
+                if not taken or row["order_number"] in taken:
+                    number = _new_order_number()
+                    while number in numbers:
+                        number = _new_order_number()
+                    numbers.add(number)
+                    row["order_number"] = number
+
+def create_orders_bulk(db: Session, orders_data: List[OrderCreate]) -> Dict[str, Any]:
+    # Set-based version of create_order for marketplace feed imports: a fixed
+    # number of statements per batch instead of several per order line.
+    results = [{"index": index, "success": False} for index in range(len(orders_data))]
+    
+    # One lookup for every referenced product and whether it has inventory
+    product_ids = {item.product_id for order_data in orders_data for item in order_data.items}
+    known_products = {}
+    if product_ids:
+        known_products = dict(db.query(Product.id, Inventory.product_id).outerjoin(
+            Inventory, Inventory.product_id == Product.id
+        ).filter(Product.id.in_(product_ids)).all())
+    
+    # Lock every stock row the batch touches, in product_id order like _change_stock,
+    # then hand out stock to orders in submission order
+    available = {}
+    if product_ids:
+        available = dict(db.query(Inventory.product_id, Inventory.quantity).filter(
+            Inventory.product_id.in_(product_ids)
+        ).order_by(Inventory.product_id).with_for_update().all())
+    
+    accepted = []
+    for index, order_data in enumerate(orders_data):
+        missing = sorted({item.product_id for item in order_data.items} - known_products.keys())
+        if missing:
+            results[index]["error"] = f"Unknown product ids: {missing}"
+            continue
+        if order_data.status != "cancelled":
+            needed = _quantities_by_product(order_data.items, 1)
+            short = sorted(pid for pid, quantity in needed.items() if pid in available and available[pid] < quantity)
+            if short:
+                results[index]["error"] = f"Insufficient stock for product ID : {short[0]}"
+                continue
+            for product_id, quantity in needed.items():
+                if product_id in available:
+                    available[product_id] -= quantity
+        accepted.append(index)
+    
+    if not accepted:
+        return _bulk_summary(results)
+    
+    # distinct within the batch, the unique index only catches clashes with stored orders
+    numbers = set()
+    for index in accepted:
+        number = _new_order_number()
+        while number in numbers:
+            number = _new_order_number()
+        numbers.add(number)
+        results[index]["order_number"] = number
+    
+    try:
+        now = datetime.now()
+        order_rows = {
+            index: {
+                "order_number": results[index]["order_number"],
+                "order_date": orders_data[index].order_date,
+                "status": orders_data[index].status,
+                "payment_status": orders_data[index].payment_status,
+                "subtotal": orders_data[index].subtotal,
+                "tax": orders_data[index].tax,
+                "shipping_cost": orders_data[index].shipping_cost,
+                "discount": orders_data[index].discount,
+                "total": orders_data[index].total,
+                "marketplace": orders_data[index].marketplace,
+                "created_at": now,
+                "updated_at": now
+            }
+            for index in accepted
+        }
+        _insert_orders(db, order_rows)
+        for index, row in order_rows.items():
+            results[index]["order_number"] = row["order_number"]
+        
+        # MySQL has no INSERT .. RETURNING, so read the generated ids back by order number
+        order_ids = dict(db.query(Order.order_number, Order.id).filter(
+            Order.order_number.in_([results[index]["order_number"] for index in accepted])
+        ).all())
+        
+        item_rows = []
+        transaction_rows = []
+        stock_decrements: Dict[int, int] = {}
+        # stays empty when the batch takes no tracked stock (all cancelled, or no inventory rows)
+        stock_changes: List[inventory_events.StockChange] = []
+        for index in accepted:
+            order_data = orders_data[index]
+            order_number = results[index]["order_number"]
+            for item_data in order_data.items:
+                item_rows.append({
+                    "order_id": order_ids[order_number],
+                    "product_id": item_data.product_id,
+                    "quantity": item_data.quantity,
+                    "unit_price": item_data.unit_price,
+                    "subtotal": item_data.quantity * item_data.unit_price,
+                    "created_at": order_data.order_date
+                })
+                if order_data.status != "cancelled" and known_products[item_data.product_id] is not None:
+                    stock_decrements[item_data.product_id] = stock_decrements.get(item_data.product_id, 0) + item_data.quantity
+                    transaction_rows.append({
+                        "product_id": item_data.product_id,
+                        "quantity_change": -item_data.quantity,
+                        "transaction_type": "sale",
+                        "reference_id": order_number,
+                        "created_at": order_data.order_date
+                    })
+        
+        if item_rows:
+            db.execute(insert(OrderItem), item_rows)
+        if transaction_rows:
+            db.execute(insert(InventoryTransaction), transaction_rows)
+        if stock_decrements:
+            # one UPDATE for every product in the batch, the rows are locked and already checked above
+            decrement = case(stock_decrements, value=Inventory.product_id, else_=0)
+            db.execute(
+                update(Inventory)
+                .where(Inventory.product_id.in_(stock_decrements.keys()))
+                .ordered_values(
+                    (Inventory.is_low_stock, Inventory.low_stock_after(-decrement)),
+                    (Inventory.quantity, Inventory.quantity - decrement)
+                )
+                .execution_options(synchronize_session=False)
+            )
+            stock_changes = _read_stock_changes(db, {product_id: -quantity for product_id, quantity in stock_decrements.items()})
+        
+        rollup_service.record_orders(db, [
+            (
+                orders_data[index].order_date,
+                orders_data[index].marketplace,
+                orders_data[index].total,
+                [(item.product_id, item.quantity, item.quantity * item.unit_price) for item in orders_data[index].items],
+                orders_data[index].status == "cancelled"
+            )
+            for index in accepted
+        ])
+        db.commit()
+        analytics_cache.invalidate_dates({orders_data[index].order_date.date() for index in accepted})
+        inventory_events.publish_stock_changes(stock_changes, "order")
+    except SQLAlchemyError as e:
+        db.rollback()
+        for index in accepted:
+            results[index].update(order_number=None, error=f"Batch insert failed: {e.__class__.__name__}")
+        return _bulk_summary(results)
+    
+    for index in accepted:
+        results[index].update(success=True, order_id=order_ids[results[index]["order_number"]])
+    return _bulk_summary(results)
+
+def _bulk_summary(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    created = sum(1 for result in results if result["success"])
+    return {"created": created, "failed": len(results) - created, "results": results}
@@ -0,0 +1,178 @@
+import itertools
+import math
+import os
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from models.inventory import Inventory, InventoryTransaction
+from models.product import Product
+from services import catalog_cache, inventory_service
+
+# Stock velocity, days of cover and reorder suggestions for every active
+# product at once. Sales come from `sale` ledger rows of the closed days in the
+# window, read in one grouped pass into a products x days matrix. Closed days
+# don't change, so that matrix is loaded once a day. Quantities do change with
+# every ledger row, so the forecast is recomputed when the ledger head (or the
+# catalog version, for names and active flags) moves:
+# that is one scan of inventory plus a few vectorized operations over the matrix.
+# Rows backdated into a closed day only show up the next day.
+
+FORECAST_WINDOW_DAYS = int(os.getenv("FORECAST_WINDOW_DAYS", "28"))
+FORECAST_LEAD_TIME_DAYS = int(os.getenv("FORECAST_LEAD_TIME_DAYS", "14"))
+# Days of sales a reorder should cover once it arrives
+FORECAST_TARGET_DAYS = int(os.getenv("FORECAST_TARGET_DAYS", "30"))
+# Safety stock in standard deviations of daily sales, 1.65 is ~95% of lead times without a stockout
+FORECAST_SERVICE_Z = float(os.getenv("FORECAST_SERVICE_Z", "1.65"))
+# Recent average, compared with the whole window to catch products picking up
+SHORT_WINDOW_DAYS = 7
+# The table holds at least LEDGER_HOT_MONTHS - 1 full months, older sales are archived
+MAX_WINDOW_DAYS = 56
+LOAD_BATCH = 100_000
+
+_lock = threading.Lock()
+# (first day after the window, window) -> (product ids, units sold per product and day)
+_history: Dict[Tuple[date, int], Tuple[np.ndarray, np.ndarray]] = {}
+# (today, window, lead time, target) -> ((ledger head, catalog version), settled, rows)
+_forecasts: Dict[Tuple[date, int, int, int], Tuple[Tuple[int, int], bool, List[Dict[str, Any]]]] = {}
+
+def _load_history(db: Session, today: date, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Units sold per product (rows, sorted by product id) and day (columns, oldest first)
+    start = today - timedelta(days=window)
+    day = func.date(InventoryTransaction.created_at)
+    stmt = (
+        select(InventoryTransaction.product_id, day, func.sum(InventoryTransaction.quantity_change))
+        .where(
+            InventoryTransaction.transaction_type == "sale",
+            InventoryTransaction.created_at >= datetime.combine(start, time.min),
+            InventoryTransaction.created_at < datetime.combine(today, time.min)
+        )
+        .group_by(InventoryTransaction.product_id, day)
+    )
+    product_ids, offsets, units = [], [], []
+    # plain tuples off the connection, the ORM result layer would take longer than the query
+    for batch in db.connection().execute(stmt.execution_options(yield_per=LOAD_BATCH)).partitions():
+        ids, days, sums = zip(*batch)
+        product_ids.append(np.array(ids, dtype=np.int64))
+        # MySQL returns dates, SQLite 'YYYY-MM-DD' strings
+        offsets.append((np.array(days, dtype="datetime64[D]") - np.datetime64(start, "D")).astype(np.int64))
+        units.append(-np.array(sums, dtype=np.float64))
+    if not product_ids:
+        return np.empty(0, dtype=np.int64), np.zeros((0, window))
+
+    keys, rows = np.unique(np.concatenate(product_ids), return_inverse=True)
+    cells = rows * window + np.concatenate(offsets)
+    matrix = np.bincount(cells, weights=np.concatenate(units), minlength=len(keys) * window)
+    return keys, matrix.reshape(len(keys), window)
+
+def _history_for(db: Session, today: date, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    key = (today, window)
+    if key not in _history:
+        # yesterday's windows are done with
+        for stale in [k for k in _history if k[0] != today]:
+            del _history[stale]
+        _history[key] = _load_history(db, today, window)
+    return _history[key]
+
+def _compute(db: Session, today: date, window: int, lead_time_days: int, target_days: int) -> List[Dict[str, Any]]:
+    keys, matrix = _history_for(db, today, window)
+    stmt = (
+        select(Inventory.product_id, Product.sku, Product.name, Inventory.quantity)
+        .join(Product, Inventory.product_id == Product.id)
+        .where(Product.is_active == True)
+        .order_by(Inventory.product_id)
+    )
+    stock = db.connection().execute(stmt).all()
+    if not stock:
+        return []
+    product_ids, skus, names, quantities = zip(*stock)
+    ids = np.array(product_ids, dtype=np.int64)
+    quantity = np.maximum(np.array(quantities, dtype=np.float64), 0)
+
+    # Sales rows of these products, zeros for products without sales in the window
+    daily = np.zeros((len(ids), window))
+    if len(keys):
+        positions = np.minimum(np.searchsorted(keys, ids), len(keys) - 1)
+        sold = keys[positions] == ids
+        daily[sold] = matrix[positions[sold]]
+
+    velocity_short = daily[:, -min(SHORT_WINDOW_DAYS, window):].mean(axis=1)
+    velocity_long = daily.mean(axis=1)
+    # the higher of the two, so a product picking up isn't averaged away
+    velocity = np.maximum(velocity_short, velocity_long)
+    safety_stock = FORECAST_SERVICE_Z * daily.std(axis=1) * math.sqrt(lead_time_days)
+    reorder_point = velocity * lead_time_days + safety_stock
+    order_up_to = velocity * (lead_time_days + target_days) + safety_stock
+    reorder_quantity = np.where(quantity <= reorder_point, np.ceil(np.maximum(order_up_to - quantity, 0)), 0)
+    with np.errstate(divide="ignore"):
+        cover = np.where(velocity > 0, quantity / np.where(velocity > 0, velocity, 1), np.inf)
+
+    # Soonest stockout first, products that don't sell last
+    order = np.lexsort((ids, cover))
+    days_of_cover = np.round(cover[order], 1).astype(object)
+    days_of_cover[np.isinf(cover[order])] = None
+    columns = zip(
+        ids[order].tolist(), [skus[i] for i in order.tolist()], [names[i] for i in order.tolist()],
+        np.array(quantities)[order].tolist(), np.round(velocity[order], 3).tolist(),
+        np.round(velocity_short[order], 3).tolist(), np.round(velocity_long[order], 3).tolist(),
+        days_of_cover.tolist(), np.ceil(reorder_point[order]).astype(np.int64).tolist(),
+        reorder_quantity[order].astype(np.int64).tolist()
+    )
+    return [
+        {
+            "product_id": product_id, "sku": sku, "name": name, "quantity": on_hand,
+            "velocity": v, "velocity_short": v_short, "velocity_long": v_long,
+            "days_of_cover": days, "reorder_point": point, "reorder_quantity": reorder
+        }
+        for product_id, sku, name, on_hand, v, v_short, v_long, days, point, reorder in columns
+    ]
+
+def get_stock_forecast(
+    db: Session,
+    window_days: int = FORECAST_WINDOW_DAYS,
+    lead_time_days: int = FORECAST_LEAD_TIME_DAYS,
+    target_days: int = FORECAST_TARGET_DAYS,
+    max_days_of_cover: Optional[float] = None
+) -> Dict[str, Any]:
+    if not 1 <= window_days <= MAX_WINDOW_DAYS:
+        raise ValueError(f"window_days must be between 1 and {MAX_WINDOW_DAYS}")
+    today = date.today()
+    key = (today, window_days, lead_time_days, target_days)
+    with _lock:
+        head, settled = inventory_service.get_ledger_head(db)
+        version = (head, catalog_cache.current_version(db))
+        cached = _forecasts.get(key)
+        # a result computed while the head was settling may have missed a
+        # lower id that committed late, so it is redone once
+        if cached is not None and cached[0] == version and cached[1]:
+            rows = cached[2]
+        else:
+            rows = _compute(db, today, window_days, lead_time_days, target_days)
+            for stale in [k for k, v in _forecasts.items() if v[0] != version or k[0] != today]:
+                del _forecasts[stale]
+            _forecasts[key] = (version, settled, rows)
+
+    if max_days_of_cover is not None:
+        # rows are ordered by days of cover, None (no sales) last
+        rows = list(itertools.takewhile(lambda row: row["days_of_cover"] is not None and row["days_of_cover"] <= max_days_of_cover, rows))
+    return {
+        "as_of": today,
+        "window_days": window_days,
+        "lead_time_days": lead_time_days,
+        "target_days": target_days,
+        "data": rows
+    }
+
+def warm_up(db: Session) -> None:
+    # Loads the default window's daily sales, the slow part of the first request of the day
+    with _lock:
+        _history_for(db, date.today(), FORECAST_WINDOW_DAYS)
+
+def clear() -> None:
+    with _lock:
+        _history.clear()
+        _forecasts.clear()
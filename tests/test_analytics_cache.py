@@ -0,0 +1,47 @@
+from datetime import date
+
+import pytest
+
+from services import analytics_cache
+
+START, END = date(2024, 5, 1), date(2024, 5, 31)
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = analytics_cache.InMemoryBackend(16, 60)
+    monkeypatch.setattr(analytics_cache, "backend", backend)
+    return backend
+
+def _counting(during=None):
+    calls = []
+
+    @analytics_cache.cached
+    def report(db, start_date, end_date):
+        calls.append(1)
+        if during:
+            during()
+        return {"calls": len(calls)}
+    return report, calls
+
+def test_result_is_cached(db, backend):
+    report, calls = _counting()
+    assert report(db, START, END) == report(db, START, END) == {"calls": 1}
+
+def test_result_read_during_invalidation_is_not_stored(db, backend):
+    # an order dated inside the range commits while the query runs
+    report, calls = _counting(during=lambda: analytics_cache.invalidate_dates([date(2024, 5, 10)]))
+    report(db, START, END)
+    report(db, START, END)
+    assert len(calls) == 2
+
+def test_replica_reads_use_replica_ttl(db, replica, backend, monkeypatch):
+    report, calls = _counting()
+    with replica() as session:
+        report(session, START, END)
+        report(session, START, END)
+        assert len(calls) == 2
+
+        monkeypatch.setattr(analytics_cache, "ANALYTICS_CACHE_REPLICA_TTL", 5)
+        report(session, START, END)
+        report(session, START, END)
+        assert len(calls) == 3
@@ -0,0 +1,59 @@
+import uuid
+from datetime import datetime
+
+from models.inventory import Inventory
+from models.sales import Order
+from schemas.sales import OrderCreate
+from services import sales_service
+
+def _order(product_id: int, status: str = "pending") -> OrderCreate:
+    return OrderCreate(
+        order_date=datetime(2024, 5, 1, 12), status=status, payment_status="paid", subtotal=10, tax=0,
+        shipping_cost=0, total=10, marketplace="amazon", items=[{"product_id": product_id, "quantity": 2, "unit_price": 5}]
+    )
+
+def test_bulk_create_all_cancelled(db, make_products):
+    ids = make_products({"A": 5})
+    summary = sales_service.create_orders_bulk(db, [_order(ids["A"], "cancelled"), _order(ids["A"], "cancelled")])
+    assert summary["created"] == 2
+    assert db.query(Order).count() == 2
+    # cancelled orders don't take stock
+    assert db.query(Inventory.quantity).filter(Inventory.product_id == ids["A"]).scalar() == 5
+
+def test_bulk_create_without_inventory_rows(db, make_products):
+    ids = make_products({"A": None, "B": None})
+    summary = sales_service.create_orders_bulk(db, [_order(ids["A"]), _order(ids["B"])])
+    assert summary["created"] == 2
+    assert all(result["success"] for result in summary["results"])
+    assert db.query(Order).count() == 2
+
+def test_bulk_create_takes_stock(db, make_products):
+    ids = make_products({"A": 3})
+    summary = sales_service.create_orders_bulk(db, [_order(ids["A"]), _order(ids["A"])])
+    # the second order only finds 1 left
+    assert [result["success"] for result in summary["results"]] == [True, False]
+    assert db.query(Inventory.quantity).filter(Inventory.product_id == ids["A"]).scalar() == 1
+
+def _uuids(monkeypatch, *values):
+    # uuid4() hands out these in turn, then fresh random ones
+    queue = [uuid.UUID(int=value) for value in values]
+    uuid4 = uuid.uuid4
+    monkeypatch.setattr(sales_service.uuid, "uuid4", lambda: queue.pop(0) if queue else uuid4())
+
+def test_bulk_create_renumbers_duplicate_order_numbers(db, make_products, monkeypatch):
+    ids = make_products({"A": 100})
+    _uuids(monkeypatch, 1, 1, 2, 2, 3)
+    existing = sales_service.create_order(db, _order(ids["A"])).order_number
+
+    # the first order draws the stored number, the third the second's
+    summary = sales_service.create_orders_bulk(db, [_order(ids["A"]) for _ in range(3)])
+    assert summary["created"] == 3
+    numbers = [result["order_number"] for result in summary["results"]]
+    assert existing not in numbers and len(set(numbers)) == 3
+    assert numbers[1] == f"ORD-{uuid.UUID(int=2).hex.upper()}"
+    assert db.query(Order).count() == 4
+    assert db.query(Inventory.quantity).filter(Inventory.product_id == ids["A"]).scalar() == 100 - 4 * 2
+
+def test_order_numbers_use_the_whole_uuid(db, make_products):
+    ids = make_products({"A": 10})
+    assert len(sales_service.create_order(db, _order(ids["A"])).order_number) == len("ORD-") + 32
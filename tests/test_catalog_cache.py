@@ -0,0 +1,29 @@
+from models.product import CatalogVersion, Category
+from services import catalog_cache, product_service
+
+def _seed(session, version, *names):
+    session.add(CatalogVersion(id=1, version=version))
+    session.add_all([Category(name=name) for name in names])
+    session.commit()
+
+def test_lagging_replica_read_is_not_cached(db, replica, catalog_cache_on):
+    _seed(db, 2, "Old", "New")
+    with replica() as lagging:
+        _seed(lagging, 1, "Old")
+    catalog_cache_on.observe(2)
+
+    with replica() as session:
+        assert [c.name for c in product_service.get_categories(session)] == ["Old"]
+    hit, _ = catalog_cache_on.get(("get_categories", (), ()))
+    assert not hit
+
+def test_caught_up_replica_read_is_cached(db, replica, catalog_cache_on):
+    _seed(db, 2, "Old", "New")
+    with replica() as session:
+        _seed(session, 2, "Old", "New")
+    catalog_cache_on.observe(2)
+
+    with replica() as session:
+        product_service.get_categories(session)
+    hit, value = catalog_cache_on.get(("get_categories", (), ()))
+    assert hit and [c.name for c in value] == ["Old", "New"]
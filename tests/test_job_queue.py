@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+from pydantic import BaseModel
+
+from models.job import Job
+from services import job_queue
+
+class _Params(BaseModel):
+    pass
+
+@pytest.fixture
+def jobs(engine, tmp_path, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_RESULTS_DIR", str(tmp_path / "results"))
+    monkeypatch.setattr(job_queue, "JOB_WORKERS", 1)
+    yield job_queue
+    job_queue.shutdown()
+
+def _kind(run):
+    return job_queue.JobKind(_Params, run, lambda params: "application/json")
+
+def _wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def _submit(db, kind):
+    job_id = job_queue.submit_job(db, kind, {})["id"]
+    # SQLite: don't sit on the write lock the workers need
+    db.rollback()
+    return job_id
+
+def _status(db, job_id):
+    try:
+        return tuple(db.query(Job.status, Job.error).filter(Job.id == job_id).one())
+    finally:
+        db.rollback()
+
+def _write(params, path, cancelled):
+    with open(path, "w") as f:
+        f.write("{}")
+
+def test_failed_final_transition_marks_job_failed(db, jobs, monkeypatch):
+    monkeypatch.setitem(jobs.JOB_KINDS, "write", _kind(_write))
+    transition = jobs._transition
+
+    def database_gone_on_success(job_id, from_statuses, **values):
+        if values.get("status") == jobs.SUCCEEDED:
+            raise RuntimeError("database went away")
+        return transition(job_id, from_statuses, **values)
+    monkeypatch.setattr(jobs, "_transition", database_gone_on_success)
+
+    job_id = _submit(db, "write")
+    _wait_for(lambda: not jobs._pending)
+    assert _status(db, job_id) == (jobs.FAILED, "database went away")
+    assert not (jobs.os.listdir(jobs.JOB_RESULTS_DIR))
+
+def test_shutdown_drops_queued_jobs_without_waiting(db, jobs, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def block(params, path, cancelled):
+        started.set()
+        release.wait(10)
+    monkeypatch.setitem(jobs.JOB_KINDS, "block", _kind(block))
+
+    running = _submit(db, "block")
+    queued = _submit(db, "block")
+    assert started.wait(10)
+    jobs.shutdown()
+    # workers are daemon threads, so the interpreter doesn't join them at exit
+    assert all(worker.daemon for worker in threading.enumerate() if worker.name.startswith("job-"))
+    assert _status(db, running)[0] == _status(db, queued)[0] == jobs.FAILED
+    assert jobs._pending == {running}
+
+    release.set()
+    _wait_for(lambda: not jobs._pending)
+    assert jobs._queue.empty()
+    assert _status(db, running)[0] == jobs.FAILED
@@ -0,0 +1,52 @@
+from datetime import date, datetime
+
+import pytest
+
+from models.inventory import InventoryTransaction
+from services import inventory_service, ledger_archive, pagination
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(ledger_archive, "LEDGER_ARCHIVE_DIR", str(tmp_path / "archive"))
+
+def _row(product_id, day, row_id=None):
+    return InventoryTransaction(
+        id=row_id, product_id=product_id, quantity_change=-1, transaction_type="sale", created_at=datetime(2024, 1, day, 12)
+    )
+
+def test_archive_deletes_only_written_rows(db, make_products, archive_dir, monkeypatch):
+    product_id = make_products({"A": 10})["A"]
+    db.add_all([_row(product_id, 5, 1), _row(product_id, 6, 3)])
+    db.commit()
+
+    # a backdated row with a lower id committing after the month was written out
+    replace = ledger_archive.os.replace
+
+    def replace_then_insert(src, dst):
+        replace(src, dst)
+        db.add(_row(product_id, 7, 2))
+        db.flush()
+    monkeypatch.setattr(ledger_archive.os, "replace", replace_then_insert)
+
+    assert ledger_archive._archive_month(db, date(2024, 1, 1)) == 2
+    assert [row["id"] for row in ledger_archive.iter_archived()] == [3, 1]
+    assert db.query(InventoryTransaction.id).all() == [(2,)]
+
+def test_backdated_row_listed_before_next_archive_run(db, make_products, archive_dir):
+    product_id = make_products({"A": 10})["A"]
+    db.add_all([_row(product_id, 5), _row(product_id, 9)])
+    db.commit()
+    ledger_archive.archive_closed_months(db, hot_months=1, today=date(2024, 2, 15))
+    db.add(_row(product_id, 7))
+    db.add(InventoryTransaction(product_id=product_id, quantity_change=5, transaction_type="restock", created_at=datetime(2024, 2, 1)))
+    db.commit()
+
+    def days(rows):
+        return [row["created_at"].date() for row in rows]
+    expected = [date(2024, 2, 1), date(2024, 1, 9), date(2024, 1, 7), date(2024, 1, 5)]
+    assert days(inventory_service.get_inventory_transactions(db, start_date=datetime(2024, 1, 1))) == expected
+    assert days(inventory_service.get_inventory_transactions(db, start_date=datetime(2024, 1, 1), skip=1, limit=2)) == expected[1:3]
+    first = inventory_service.get_inventory_transactions(db, start_date=datetime(2024, 1, 1), limit=2)
+    cursor = pagination.encode_cursor(first[-1]["created_at"], first[-1]["id"])
+    assert days(inventory_service.get_inventory_transactions(db, start_date=datetime(2024, 1, 1), cursor=cursor)) == expected[2:]
+    assert days(inventory_service.export_inventory_transactions(db)) == expected
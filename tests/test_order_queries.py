@@ -0,0 +1,53 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from schemas.sales import Order as OrderSchema, OrderCreate
+from services import sales_service
+
+ORDERS = 30
+
+@contextmanager
+def count_statements(db):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    # open the transaction first so its BEGIN isn't counted
+    connection = db.connection()
+    event.listen(connection.engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(connection.engine, "before_cursor_execute", record)
+
+def _seed_orders(db, make_products):
+    ids = list(make_products({f"SKU-{i}": 10_000 for i in range(3)}).values())
+    orders = [
+        OrderCreate(
+            order_date=datetime(2024, 5, 1) + timedelta(hours=i), status="pending", payment_status="paid", subtotal=30,
+            tax=0, shipping_cost=0, total=30, marketplace="amazon",
+            items=[{"product_id": product_id, "quantity": 2, "unit_price": 5} for product_id in ids]
+        )
+        for i in range(ORDERS)
+    ]
+    return sales_service.create_orders_bulk(db, orders)["results"]
+
+def test_get_orders_statement_count(db, make_products):
+    _seed_orders(db, make_products)
+    db.expire_all()
+    with count_statements(db) as statements:
+        orders = sales_service.get_orders(db, limit=ORDERS)
+        assert sum(len(order["items"]) for order in orders) == ORDERS * 3
+    # the page, then every item of the page in one IN query
+    assert len(statements) <= 2
+
+def test_get_order_statement_count(db, make_products):
+    order_id = _seed_orders(db, make_products)[0]["order_id"]
+    db.expire_all()
+    with count_statements(db) as statements:
+        # serialized like the endpoint does, touching every item
+        order = OrderSchema.from_orm(sales_service.get_order(db, order_id))
+        assert len(order.items) == 3
+    assert len(statements) <= 2
@@ -0,0 +1,22 @@
+import json
+
+from sqlalchemy import create_engine
+
+import database
+from benchmarks import query_plans
+
+def test_no_plan_regressions(tmp_path, monkeypatch):
+    # seed() binds database (and demo_data, only imported for seeding) to the throwaway engine
+    monkeypatch.setattr(database, "engine", database.engine)
+    bind = database.SessionLocal.kw["bind"]
+    engine = create_engine(f"sqlite:///{tmp_path / 'plans.db'}")
+    try:
+        query_plans.seed(engine, query_plans.DEFAULT_ORDERS)
+        report = query_plans.run(engine)
+    finally:
+        database.SessionLocal.configure(bind=bind)
+        engine.dispose()
+
+    with open(query_plans.BASELINE) as f:
+        baseline = json.load(f)
+    assert query_plans.regressions(report, baseline) == []
@@ -0,0 +1,58 @@
+import threading
+from datetime import datetime
+
+from sqlalchemy import func
+
+import database
+from models.inventory import Inventory, InventoryTransaction
+from schemas.sales import OrderCreate, OrderItemCreate
+from services import sales_service
+
+THREADS = 16
+
+def _order(items):
+    subtotal = sum(quantity * 5.0 for _, quantity in items)
+    return OrderCreate(
+        order_date=datetime(2024, 5, 1), status="pending", payment_status="paid", subtotal=subtotal, tax=0,
+        shipping_cost=0, total=subtotal, marketplace="web",
+        items=[OrderItemCreate(product_id=product_id, quantity=quantity, unit_price=5.0) for product_id, quantity in items]
+    )
+
+def test_concurrent_orders_never_oversell(db, make_products):
+    ids = make_products({"SCARCE": 20, "PLENTY": 100})
+    # the plentiful product comes first in half the orders, so lock order matters
+    orders = [
+        _order([(ids["SCARCE"], 3), (ids["PLENTY"], 1)] if i % 2 else [(ids["PLENTY"], 1), (ids["SCARCE"], 3)])
+        for i in range(THREADS)
+    ]
+    start = threading.Barrier(THREADS)
+    outcomes = [None] * THREADS
+
+    def place(index):
+        session = database.SessionLocal()
+        try:
+            start.wait()
+            sales_service.create_order(session, orders[index])
+            outcomes[index] = "created"
+        except sales_service.InsufficientStockError:
+            outcomes[index] = "insufficient"
+        except Exception as e:
+            outcomes[index] = repr(e)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=place, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes.count("created") == 20 // 3
+    assert outcomes.count("insufficient") == THREADS - 20 // 3
+
+    db.expire_all()
+    stock = dict(db.query(Inventory.product_id, Inventory.quantity).all())
+    assert stock == {ids["SCARCE"]: 20 % 3, ids["PLENTY"]: 100 - 20 // 3}
+    # the ledger accounts for every unit taken
+    sold = dict(db.query(InventoryTransaction.product_id, func.sum(InventoryTransaction.quantity_change)).group_by(InventoryTransaction.product_id).all())
+    assert {ids["SCARCE"]: 20 + sold[ids["SCARCE"]], ids["PLENTY"]: 100 + sold[ids["PLENTY"]]} == stock
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from models.inventory import InventoryTransaction
+from models.product import CatalogVersion
+from services import catalog_cache, inventory_service
+
+def test_catalog_version_of_replica_session(db, replica, catalog_cache_on):
+    db.add(CatalogVersion(id=1, version=2))
+    db.commit()
+    with replica() as session:
+        session.add(CatalogVersion(id=1, version=1))
+        session.commit()
+    catalog_cache_on.observe(2)
+
+    assert catalog_cache.current_version(db) == 2
+    with replica() as session:
+        # tags what the replica serves, not what the primary has
+        assert catalog_cache.current_version(session) == 1
+
+def test_ledger_head_settles_per_engine(db, replica, make_products, monkeypatch):
+    monkeypatch.setattr(inventory_service, "LEDGER_SETTLE_SECONDS", 0)
+    monkeypatch.setattr(inventory_service, "_ledger_max", {})
+    product_id = make_products({"A": 1})["A"]
+    db.add(InventoryTransaction(product_id=product_id, quantity_change=1, transaction_type="restock", created_at=datetime.now()))
+    db.commit()
+
+    with replica() as session:
+        # first sight of each head, on either side
+        assert inventory_service.get_ledger_head(db) == (1, False)
+        assert inventory_service.get_ledger_head(session) == (0, False)
+        # alternating between primary and lagging replica doesn't reset either
+        assert inventory_service.get_ledger_head(db) == (1, True)
+        assert inventory_service.get_ledger_head(session) == (0, True)
@@ -0,0 +1,82 @@
+import asyncio
+import time
+from datetime import date
+
+from sqlalchemy.orm import configure_mappers
+from starlette.concurrency import run_in_threadpool
+
+import database
+from services import analytics_service, inventory_service, product_search, product_service, sales_service, stock_forecast
+
+def _hot_queries(db) -> None:
+    # One cheap call per hot read path so SQLAlchemy's compiled statement cache
+    # is filled before the first real request. The catalog and analytics calls
+    # go around their result caches so nothing lands in them.
+    today = date.today()
+    product_service.get_products.__wrapped__(db, 0, 1, None)
+    inventory_service.get_low_stock_products(db)
+    sales_service.get_orders(db, None, None, None, None, 0, 1)
+    analytics_service.get_revenue_by_period.__wrapped__(db, today, today, "day")
+    analytics_service.get_sales_by_category.__wrapped__(db, today, today)
+    analytics_service.get_marketplace_performance.__wrapped__(db, today, today)
+    db.rollback()
+
+def _open_connections(engine, count: int) -> None:
+    connections = [engine.connect() for _ in range(count)]
+    for connection in connections:
+        connection.close()
+
+async def _open_connections_async(engine, count: int) -> None:
+    connections = await asyncio.gather(*(engine.connect() for _ in range(count)))
+    for connection in connections:
+        await connection.close()
+
+def _run_hot_queries(session_factory) -> None:
+    db = session_factory()
+    try:
+        _hot_queries(db)
+    finally:
+        db.close()
+
+def _build_search_index() -> None:
+    db = database.SessionLocal()
+    try:
+        product_search.warm_up(db)
+    finally:
+        db.close()
+
+def _load_sales_history() -> None:
+    db = database.ReadSessionLocal()
+    try:
+        stock_forecast.warm_up(db)
+    finally:
+        db.close()
+
+async def warm_up() -> float:
+    # Fill the connection pools and statement caches, build the product search
+    # index and load the forecast's daily sales before the worker reports ready. Returns the seconds it took.
+    started = time.perf_counter()
+    configure_mappers()
+    count = min(database.DB_WARMUP_CONNECTIONS, database.DB_POOL_SIZE + database.DB_MAX_OVERFLOW)
+    if database.DB_ASYNC:
+        targets = [(database.async_engine, database.AsyncSessionLocal)]
+        if database.async_read_engine is not database.async_engine:
+            targets.append((database.async_read_engine, database.AsyncReadSessionLocal))
+        await asyncio.gather(*(_open_connections_async(engine, count) for engine, _ in targets))
+        for _, session_factory in targets:
+            async with session_factory() as db:
+                await db.run_sync(_hot_queries)
+        async with database.AsyncSessionLocal() as db:
+            await db.run_sync(product_search.warm_up)
+        async with database.AsyncReadSessionLocal() as db:
+            await db.run_sync(stock_forecast.warm_up)
+    else:
+        targets = [(database.engine, database.SessionLocal)]
+        if database.read_engine is not database.engine:
+            targets.append((database.read_engine, database.ReadSessionLocal))
+        await asyncio.gather(*(run_in_threadpool(_open_connections, engine, count) for engine, _ in targets))
+        for _, session_factory in targets:
+            await run_in_threadpool(_run_hot_queries, session_factory)
+        await run_in_threadpool(_build_search_index)
+        await run_in_threadpool(_load_sales_history)
+    return time.perf_counter() - started